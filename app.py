@@ -2,22 +2,26 @@
 CFA Level III Mock Exam Generator - Main Streamlit Application
 """
 import streamlit as st
+import asyncio
 import os
-import json
+import hashlib
+import shutil
+import threading
+import re
+import orjson
 import time
-from datetime import datetime, timedelta
-from typing import Dict, List
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-
-# Import our custom modules
-from src.pdf_processor import CFAPDFProcessor, ingest_pdfs
-from src.question_generator import CFAQuestionGenerator
-from src.exam_builder import CFAExamBuilder
-from src.grading_engine import CFAGradingEngine
-from src.export_utils import CFAExportUtils, export_exam
-from config.topics import TOPIC_WEIGHTS, QUESTION_TYPES
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Dict, List
+
+from config.pages import PAGE_KEYS, PAGE_LABELS
+
+if TYPE_CHECKING:
+    from src.question_generator import CFAQuestionGenerator
+
+# Custom modules (PyPDF2, OpenAI, ...) are imported inside the pages that use
+# them so each rerun only loads what the selected page needs
 
 # Page configuration
 st.set_page_config(
@@ -27,13 +31,40 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Upload streaming: 1 MiB copy chunks, larger write buffer for very big books
+UPLOAD_COPY_CHUNK = 1 << 20
+LARGE_UPLOAD_BYTES = 256 * (1 << 20)
+LARGE_WRITE_BUFFER = 1 << 22
+
+UPLOAD_DIR = Path("data/uploaded_pdfs")
+# Accepted upload names once any directory part is stripped
+SAFE_PDF_NAME = re.compile(r"[\w .()\-]+\.pdf", re.IGNORECASE)
+
+# Processed PDF results keyed by SHA-256 of the file bytes
+PDF_CACHE_DIR = "data/processed/cache"
+PDF_CONTENT_PATH = "data/processed/pdf_content.json"
+QUESTIONS_DIR = "data/generated_questions"
+
+# Also write human-readable copies of machine-facing JSON files
+DEBUG_JSON = os.getenv("CFA_DEBUG_JSON", "").lower() in ("1", "true", "yes")
+
+@st.cache_resource(show_spinner=False)
+def ensure_data_dirs():
+    """Create the app's data directories once per process rather than on every rerun"""
+    for data_dir in (UPLOAD_DIR, "data/processed", PDF_CACHE_DIR):
+        os.makedirs(data_dir, exist_ok=True)
+
 def initialize_session_state():
     if 'processed_pdfs' not in st.session_state:
         st.session_state.processed_pdfs = None
+    if 'pdf_content_sha' not in st.session_state:
+        st.session_state.pdf_content_sha = None
     if 'current_exam' not in st.session_state:
         st.session_state.current_exam = None
     if 'exam_start_time' not in st.session_state:
         st.session_state.exam_start_time = None
+    if 'exam_deadline' not in st.session_state:
+        st.session_state.exam_deadline = None
     if 'user_answers' not in st.session_state:
         st.session_state.user_answers = {}
     if 'exam_submitted' not in st.session_state:
@@ -42,6 +73,7 @@ def initialize_session_state():
         st.session_state.grading_results = None
 
 def main():
+    ensure_data_dirs()
     initialize_session_state()
     
     st.title("🎓 CFA Level III Mock Exam Generator")
@@ -49,14 +81,12 @@ def main():
     
     # Sidebar navigation
     st.sidebar.title("Navigation")
-    page = st.sidebar.selectbox("Choose a page", [
-        "📚 PDF Upload & Processing",
-        "🔧 Question Generation", 
-        "📝 Exam Builder",
-        "⏱️ Take Exam",
-        "📊 Results & Analysis",
-        "📄 Export Options"
-    ])
+    page = st.sidebar.selectbox(
+        "Choose a page",
+        PAGE_KEYS,
+        format_func=PAGE_LABELS.get,
+        key="page"
+    )
     
     # API Key setup
     st.sidebar.markdown("---")
@@ -65,27 +95,24 @@ def main():
     if not os.path.exists('.env'):
         api_key = st.sidebar.text_input("OpenAI API Key", type="password")
         if api_key:
-            with open('.env', 'w') as f:
-                f.write(f"OPENAI_API_KEY={api_key}\n")
-                f.write("OPENAI_MODEL=gpt-4-turbo-preview\n")
+            save_api_key(api_key)
             st.sidebar.success("API key saved!")
             st.rerun()
     else:
         st.sidebar.success("✅ API key configured")
     
     # Route to pages
-    if page == "📚 PDF Upload & Processing":
-        pdf_upload_page()
-    elif page == "🔧 Question Generation":
-        question_generation_page()
-    elif page == "📝 Exam Builder":
-        exam_builder_page()
-    elif page == "⏱️ Take Exam":
-        take_exam_page()
-    elif page == "📊 Results & Analysis":
-        results_analysis_page()
-    elif page == "📄 Export Options":
-        export_options_page()
+    PAGES[page]()
+
+def save_api_key(api_key: str, env_path: str = ".env"):
+    """Atomically write the API key to .env (owner-only)"""
+    tmp_path = f"{env_path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        f.write(f"OPENAI_API_KEY={api_key}\n")
+        f.write("OPENAI_MODEL=gpt-4-turbo-preview\n")
+    os.chmod(tmp_path, 0o600)
+    os.replace(tmp_path, env_path)
 
 def pdf_upload_page():
     st.header("📚 PDF Upload & Processing")
@@ -98,29 +125,151 @@ def pdf_upload_page():
     
     if uploaded_files:
         pdf_paths = []
-        os.makedirs("data/uploaded_pdfs", exist_ok=True)
-        
         for uploaded_file in uploaded_files:
-            file_path = f"data/uploaded_pdfs/{uploaded_file.name}"
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+            # Drop any client-supplied directories so uploads can't escape UPLOAD_DIR
+            safe_name = PurePosixPath(uploaded_file.name.replace("\\", "/")).name
+            if not SAFE_PDF_NAME.fullmatch(safe_name):
+                st.error(f"❌ Skipping {uploaded_file.name}: unsupported file name")
+                continue
+            
+            file_path = str(UPLOAD_DIR / safe_name)
+            save_uploaded_file(uploaded_file, file_path)
             pdf_paths.append(file_path)
         
         if st.button("🔄 Process PDFs", type="primary"):
             with st.spinner("Processing PDFs..."):
-                processor = CFAPDFProcessor()
-                results = processor.process_multiple_pdfs(pdf_paths)
-                
-                os.makedirs("data/processed", exist_ok=True)
-                with open("data/processed/pdf_content.json", 'w') as f:
-                    json.dump(results, f, indent=2)
-                
+                results = process_uploaded_pdfs(pdf_paths)
+                # The topic grouping is derived when loaded (see _build_topic_index),
+                # so the persisted corpus holds each chunk once
+                payload = orjson.dumps(results)
                 st.session_state.processed_pdfs = results
+                st.session_state.pdf_content_sha = hashlib.sha256(payload).hexdigest()
+                
+                # The in-memory copy is all the UI needs; persist to disk in the background
+                wait_for_pdf_dump()
+                st.session_state.pdf_dump_in_flight = threading.Thread(
+                    target=dump_processed_corpus, args=(results, payload), daemon=True
+                )
+                st.session_state.pdf_dump_in_flight.start()
                 st.success("✅ PDFs processed successfully!")
 
+def dump_processed_corpus(results: Dict, payload: bytes):
+    """Atomically write the processed corpus (and its debug copy) to disk"""
+    tmp_path = f"{PDF_CONTENT_PATH}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_path, PDF_CONTENT_PATH)
+    
+    if DEBUG_JSON:
+        with open("data/processed/pdf_content.pretty.json", 'wb') as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+
+def wait_for_pdf_dump():
+    """Block until any background corpus write from this session has finished"""
+    dump_thread = st.session_state.get("pdf_dump_in_flight")
+    if dump_thread is not None:
+        dump_thread.join()
+        st.session_state.pdf_dump_in_flight = None
+
+def save_uploaded_file(uploaded_file, file_path: str):
+    """Stream an upload to disk in fixed-size chunks so memory stays bounded"""
+    uploaded_file.seek(0)
+    large_file = uploaded_file.size > LARGE_UPLOAD_BYTES
+    
+    with open(file_path, "wb", buffering=LARGE_WRITE_BUFFER if large_file else -1) as f:
+        if large_file and hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        shutil.copyfileobj(uploaded_file, f, length=UPLOAD_COPY_CHUNK)
+
+def _sha256_file(file_path: str) -> str:
+    """SHA-256 of a file's bytes, hashed straight from a read-only memory map"""
+    from src.pdf_processor import mapped_pdf
+    
+    with mapped_pdf(file_path) as mm:
+        return hashlib.sha256(mm if mm is not None else b"").hexdigest()
+
+@st.cache_data(show_spinner=False)
+def load_cached_pdf_result(digest: str) -> Dict:
+    """Load a previously processed PDF result from the content-hash cache"""
+    with open(os.path.join(PDF_CACHE_DIR, f"{digest}.json"), 'rb') as f:
+        return orjson.loads(f.read())
+
+def store_cached_pdf_result(digest: str, result: Dict):
+    """Atomically write a processed PDF result into the content-hash cache"""
+    cache_path = os.path.join(PDF_CACHE_DIR, f"{digest}.json")
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(result))
+    os.replace(tmp_path, cache_path)
+
+def process_uploaded_pdfs(pdf_paths: List[str]) -> Dict:
+    """Process uploaded PDFs, skipping any whose bytes were already processed"""
+    from src.pdf_processor import combine_pdf_results, _process_one_pdf
+    
+    file_results = [None] * len(pdf_paths)
+    misses = []
+    
+    for i, path in enumerate(pdf_paths):
+        digest = _sha256_file(path)
+        if os.path.exists(os.path.join(PDF_CACHE_DIR, f"{digest}.json")):
+            file_results[i] = load_cached_pdf_result(digest)
+        else:
+            misses.append((i, path, digest))
+    
+    if len(misses) == 1:
+        # Process start-up costs more than it saves for a single book
+        i, path, _ = misses[0]
+        miss_results = [_process_one_pdf(path)]
+    elif misses:
+        miss_results = process_pdfs_in_parallel([path for _, path, _ in misses])
+    else:
+        miss_results = []
+    
+    for (i, _, digest), result in zip(misses, miss_results):
+        if "error" not in result:
+            store_cached_pdf_result(digest, result)
+        file_results[i] = result
+    
+    return combine_pdf_results(file_results)
+
+def process_pdfs_in_parallel(pdf_paths: List[str]) -> List[Dict]:
+    """Process PDFs one file per worker process, updating progress as each finishes"""
+    from src.pdf_processor import _get_max_workers, _process_one_pdf
+    
+    progress = st.progress(0.0, text="Processing PDFs...")
+    file_results = [None] * len(pdf_paths)
+    
+    max_workers = min(_get_max_workers(), len(pdf_paths))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_process_one_pdf, path): i for i, path in enumerate(pdf_paths)}
+        for done, future in enumerate(as_completed(futures), 1):
+            # Keep upload order so chunk ordering is stable across runs
+            file_results[futures[future]] = future.result()
+            progress.progress(done / len(futures), text=f"Processed {done}/{len(futures)} PDFs")
+    
+    return file_results
+
+@st.cache_data(show_spinner=False)
+def load_processed_corpus(path: str, mtime: float):
+    """Load the processed corpus and its content hash; mtime keys the cache so edits invalidate it"""
+    with open(path, 'rb') as f:
+        payload = f.read()
+    return hashlib.sha256(payload).hexdigest(), orjson.loads(payload)
+
+def restore_processed_corpus():
+    """Restore the last processed corpus from disk into a fresh session"""
+    wait_for_pdf_dump()
+    if st.session_state.processed_pdfs or not os.path.exists(PDF_CONTENT_PATH):
+        return
+    
+    sha, corpus = load_processed_corpus(PDF_CONTENT_PATH, os.path.getmtime(PDF_CONTENT_PATH))
+    st.session_state.processed_pdfs = corpus
+    st.session_state.pdf_content_sha = sha
+
 def question_generation_page():
     st.header("🔧 Question Generation")
     
+    restore_processed_corpus()
     if not st.session_state.processed_pdfs:
         st.warning("⚠️ Please process PDFs first.")
         return
@@ -137,44 +286,92 @@ def question_generation_page():
         if st.button("Generate PM Questions"):
             generate_questions("PM", pm_count)
 
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _build_topic_index(pdf_content_sha: str, _processed_data: Dict) -> Dict[str, List[Dict]]:
+    """Topic -> chunks index for a processed corpus, built once per content hash"""
+    from src.pdf_processor import group_chunks_by_topic
+    
+    # Always derived from all_chunks; a grouping stored by older versions is ignored
+    return group_chunks_by_topic(_processed_data['all_chunks'])
+
 def generate_questions(session: str, count: int):
+    from src.question_generator import CFAQuestionGenerator
+    
     with st.spinner(f"Generating {session} questions..."):
         generator = CFAQuestionGenerator()
-        processed_data = st.session_state.processed_pdfs
+        chunks_by_topic = _build_topic_index(
+            st.session_state.pdf_content_sha, st.session_state.processed_pdfs
+        )
         
-        chunks_by_topic = {}
-        for chunk in processed_data['all_chunks']:
-            topic = chunk['topic']
-            if topic not in chunks_by_topic:
-                chunks_by_topic[topic] = []
-            chunks_by_topic[topic].append(chunk)
-        
-        all_questions = []
         questions_per_topic = max(1, count // len(chunks_by_topic))
+        question_type = "constructed" if session == "AM" else "item_set"
         
-        for topic, chunks in chunks_by_topic.items():
-            if chunks:
-                topic_questions = generator.generate_questions_for_topic(
-                    chunks, 
-                    "constructed" if session == "AM" else "item_set",
-                    min(questions_per_topic, len(chunks))
-                )
-                all_questions.extend(topic_questions)
+        # All topics run concurrently; one topic failing must not abort the batch
+        topic_results = asyncio.run(
+            generate_all_topics(generator, chunks_by_topic, question_type, questions_per_topic)
+        )
+        
+        all_questions = []
+        for topic, result in topic_results.items():
+            if isinstance(result, Exception):
+                st.warning(f"⚠️ Could not generate questions for {topic}")
+            else:
+                all_questions.extend(result)
         
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{session}_questions_{timestamp}.json"
-        generator.save_questions_to_json(all_questions, filename)
+        # One append-only pool per session; only the new questions are serialized
+        generator.append_questions_to_jsonl(all_questions, f"{session}_questions.jsonl")
         
         st.success(f"✅ Generated {len(all_questions)} {session} questions!")
 
+async def generate_all_topics(generator: "CFAQuestionGenerator", chunks_by_topic: Dict[str, List[Dict]],
+                              question_type: str, questions_per_topic: int) -> Dict:
+    """Fan out per-topic generation and collect results (or exceptions) by topic"""
+    from src.llm_client import make_async_client
+    from src.question_generator import MAX_CONCURRENT_REQUESTS
+    
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    topics = [topic for topic, chunks in chunks_by_topic.items() if chunks]
+    
+    # One client per asyncio.run: its pooled connections are bound to this loop
+    async with make_async_client() as client:
+        results = await asyncio.gather(*[
+            generator.generate_questions_for_topic_async(
+                client,
+                chunks_by_topic[topic],
+                question_type,
+                min(questions_per_topic, len(chunks_by_topic[topic])),
+                semaphore
+            )
+            for topic in topics
+        ], return_exceptions=True)
+    return dict(zip(topics, results))
+
+def _questions_pool_signature(questions_dir: str = QUESTIONS_DIR) -> tuple:
+    """Name, size and mtime of every pool file; changes whenever questions are added"""
+    if not os.path.isdir(questions_dir):
+        return ()
+    with os.scandir(questions_dir) as entries:
+        return tuple(sorted(
+            (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+            for entry in entries if entry.is_file()
+        ))
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_builder(pool_signature: tuple):
+    """One exam builder with its loaded question pool, shared until the pool changes on disk"""
+    from src.exam_builder import CFAExamBuilder
+    
+    builder = CFAExamBuilder()
+    builder.load_questions_pool(QUESTIONS_DIR)
+    return builder
+
 def exam_builder_page():
     st.header("📝 Exam Builder")
     
     exam_mode = st.selectbox("Select exam session", ["AM", "PM", "Both"])
     
     if st.button("🏗️ Build Exam", type="primary"):
-        builder = CFAExamBuilder()
-        builder.load_questions_pool()
+        builder = get_builder(_questions_pool_signature())
         
         if exam_mode == "Both":
             am_exam = builder.build_exam(mode="AM")
@@ -197,18 +394,21 @@ def take_exam_page():
     selected_session = st.selectbox("Select session", sessions) if len(sessions) > 1 else sessions[0]
     exam_data = st.session_state.current_exam[selected_session]
     
-    if not st.session_state.exam_start_time:
+    if st.session_state.exam_deadline is None:
         st.subheader(f"Ready to start {selected_session} session")
         if st.button("🚀 Start Exam"):
             st.session_state.exam_start_time = datetime.now()
+            # Monotonic clock so wall-clock (NTP) adjustments can't stretch or pause the timer
+            st.session_state.exam_deadline = time.monotonic() + exam_data['total_time_minutes'] * 60
             st.rerun()
     else:
         # Display exam questions and timer
-        elapsed = datetime.now() - st.session_state.exam_start_time
-        remaining = timedelta(minutes=exam_data['total_time_minutes']) - elapsed
+        remaining = int(st.session_state.exam_deadline - time.monotonic())
         
-        if remaining.total_seconds() > 0:
-            st.markdown(f"### ⏰ Time Remaining: {str(remaining).split('.')[0]}")
+        if remaining > 0:
+            minutes, seconds = divmod(remaining, 60)
+            hours, minutes = divmod(minutes, 60)
+            st.markdown(f"### ⏰ Time Remaining: {hours}:{minutes:02d}:{seconds:02d}")
             st.write("Exam interface would be displayed here...")
             
             if st.button("📤 Submit Exam"):
@@ -239,5 +439,14 @@ def export_options_page():
     if st.button("💾 Export as JSON"):
         st.success("JSON export functionality ready!")
 
+PAGES = {
+    "upload": pdf_upload_page,
+    "generate": question_generation_page,
+    "build": exam_builder_page,
+    "exam": take_exam_page,
+    "results": results_analysis_page,
+    "export": export_options_page
+}
+
 if __name__ == "__main__":
     main()
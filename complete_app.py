@@ -1,8 +1,16 @@
 import streamlit as st
-import json
+import orjson
 import os
-from datetime import datetime, timedelta
+import copy
+import time
+from datetime import datetime
 import random
+import numpy as np
+
+from src.standard_exam import (
+    AM_FORMAT_MD, AM_SCENARIOS, CONTENT_SOURCE_HEADER_MD, PM_FORMAT_MD, PM_VIGNETTES,
+    SAMPLE_CONTENT_MD, SESSION_DEFAULTS, AMQuestion, ItemSet, MCQ, SubQuestion
+)
 
 st.set_page_config(
     page_title="CFA Level III Mock Exam Generator",
@@ -27,27 +35,37 @@ CFA_STANDARDS = {
     }
 }
 
+# Form answers only reach the server on a submit; the exam page clicks
+# Save Draft on this interval so the timeout has recent answers to grade
+DRAFT_SAVE_SECONDS = 60
+
 def initialize_session_state():
-    if 'processed_content' not in st.session_state:
-        st.session_state.processed_content = None
-    if 'current_exam' not in st.session_state:
-        st.session_state.current_exam = None
-    if 'exam_started' not in st.session_state:
-        st.session_state.exam_started = False
-    if 'start_time' not in st.session_state:
-        st.session_state.start_time = None
-    if 'user_answers' not in st.session_state:
-        st.session_state.user_answers = {}
-    if 'exam_submitted' not in st.session_state:
-        st.session_state.exam_submitted = False
-    if 'grading_results' not in st.session_state:
-        st.session_state.grading_results = None
+    for key, value in SESSION_DEFAULTS.items():
+        # Copy so sessions never share a mutable default
+        st.session_state.setdefault(key, copy.copy(value))
+
+@st.cache_resource(show_spinner=False)
+def _read_sample_content():
+    """Parse the sample content once per process; every session shares the same read-only dict"""
+    try:
+        # Pre-built module (scripts/build_sample_content.py) loads from cached bytecode
+        from data.sample_cfa_content import CONTENT
+        content = dict(CONTENT)
+    except ImportError:
+        with open('data/sample_cfa_content.json', 'rb') as f:
+            content = orjson.loads(f.read())
+    
+    # Indexable, immutable views for random.sample/choice on the exam-build path
+    content['_topics'] = tuple(content['chunks_by_topic'])
+    content['_topic_chunks'] = {
+        topic: tuple(chunks) for topic, chunks in content['chunks_by_topic'].items()
+    }
+    return content
 
 def load_sample_content():
     """Load pre-loaded CFA content"""
     try:
-        with open('data/sample_cfa_content.json', 'r') as f:
-            return json.load(f)
+        return _read_sample_content()
     except FileNotFoundError:
         return None
 
@@ -56,54 +74,20 @@ def generate_standard_am_questions():
     if not st.session_state.processed_content:
         return []
     
-    chunks_by_topic = st.session_state.processed_content['chunks_by_topic']
+    content = st.session_state.processed_content
+    topic_chunks = content['_topic_chunks']
     questions = []
     
     # Select 4 different topics for variety
-    available_topics = list(chunks_by_topic.keys())
+    available_topics = content['_topics']
     selected_topics = random.sample(available_topics, min(4, len(available_topics)))
     
-    am_scenarios = {
-        "Asset Allocation": {
-            "scenario": "You are the chief investment officer for the ABC Pension Fund, which has $5 billion in assets under management. The fund's current strategic asset allocation is 60% equities, 30% fixed income, and 10% alternatives. The board is concerned about the fund's risk exposure and is considering a review of the asset allocation policy.",
-            "sub_questions": [
-                {"part": "A", "question": "Explain the key principles of strategic asset allocation and how they differ from tactical asset allocation approaches.", "points": 8},
-                {"part": "B", "question": "Describe three methods for determining optimal asset allocation weights and discuss their relative advantages and limitations.", "points": 12},
-                {"part": "C", "question": "Calculate the expected portfolio return and standard deviation given the following assumptions: Equities (E[R]=8%, σ=18%), Bonds (E[R]=4%, σ=6%), Alternatives (E[R]=10%, σ=22%), with correlations ρ(E,B)=0.2, ρ(E,A)=0.6, ρ(B,A)=0.1.", "points": 10}
-            ]
-        },
-        "Portfolio Construction": {
-            "scenario": "XYZ Asset Management is launching a new multi-factor equity strategy for institutional clients. The strategy will target exposure to value, momentum, quality, and low volatility factors across developed markets.",
-            "sub_questions": [
-                {"part": "A", "question": "Describe the theoretical foundation for each of the four factors and explain why they are expected to generate risk premiums.", "points": 12},
-                {"part": "B", "question": "Discuss the implementation challenges in factor investing and propose solutions for factor timing and portfolio construction.", "points": 10},
-                {"part": "C", "question": "Design a factor allocation framework that balances factor exposures while managing turnover and transaction costs.", "points": 8}
-            ]
-        },
-        "Performance Management": {
-            "scenario": "The DEF Endowment Fund has hired you to evaluate the performance of their equity portfolio over the past three years. The portfolio returned 12.5% annually while the benchmark returned 11.2%. The portfolio's tracking error was 4.2%.",
-            "sub_questions": [
-                {"part": "A", "question": "Calculate and interpret the information ratio, Sharpe ratio (assuming risk-free rate of 2%), and Treynor ratio (portfolio beta = 1.1) for the portfolio.", "points": 10},
-                {"part": "B", "question": "Conduct a Brinson-Fachler performance attribution analysis to decompose returns into asset allocation, security selection, and interaction effects.", "points": 12},
-                {"part": "C", "question": "Evaluate whether the portfolio's active risk budget is being used efficiently and recommend improvements.", "points": 8}
-            ]
-        },
-        "Portfolio Management Pathway": {
-            "scenario": "You are advising a high-net-worth family with $50 million in investable assets. The family consists of a 55-year-old entrepreneur, his 52-year-old spouse, and two children aged 16 and 18. They have significant tax considerations and estate planning needs.",
-            "sub_questions": [
-                {"part": "A", "question": "Identify and analyze the key constraints and objectives for this family's investment policy statement.", "points": 8},
-                {"part": "B", "question": "Design an appropriate asset allocation strategy considering their tax situation, liquidity needs, and multi-generational wealth transfer goals.", "points": 12},
-                {"part": "C", "question": "Recommend specific investment structures and vehicles to optimize after-tax returns and facilitate wealth transfer.", "points": 10}
-            ]
-        }
-    }
-    
     for i, topic in enumerate(selected_topics, 1):
-        if topic in am_scenarios:
-            scenario_data = am_scenarios[topic]
+        if topic in AM_SCENARIOS:
+            scenario_data = AM_SCENARIOS[topic]
         else:
             # Default scenario for other topics
-            chunk = random.choice(chunks_by_topic[topic])
+            chunk = random.choice(topic_chunks[topic])
             scenario_data = {
                 "scenario": f"Consider the following scenario related to {topic}: {chunk['content'][:300]}...",
                 "sub_questions": [
@@ -112,22 +96,28 @@ def generate_standard_am_questions():
                 ]
             }
         
-        question = {
-            "question_id": f"AM_Q{i}_{topic.replace(' ', '_')}",
-            "question_number": i,
-            "topic": topic,
-            "scenario": scenario_data["scenario"],
-            "sub_questions": scenario_data["sub_questions"],
-            "total_points": sum([sq["points"] for sq in scenario_data["sub_questions"]]),
-            "estimated_time_minutes": 45,
-            "answer_key": [
+        # Widget keys are built once here rather than on every rerun
+        sub_questions = [
+            SubQuestion(sq["part"], sq["question"], sq["points"], f"q{i}_{sq['part']}")
+            for sq in scenario_data["sub_questions"]
+        ]
+        
+        question = AMQuestion(
+            question_id=f"AM_Q{i}_{topic.replace(' ', '_')}",
+            question_number=i,
+            topic=topic,
+            scenario=scenario_data["scenario"],
+            sub_questions=sub_questions,
+            total_points=sum(sq.points for sq in sub_questions),
+            estimated_time_minutes=45,
+            answer_key=[
                 {
-                    "part": sq["part"],
-                    "answer": f"[Model answer for part {sq['part']} would be provided here with detailed explanation and calculations]",
-                    "rubric": f"Award {sq['points']} points for comprehensive answer addressing all key concepts with proper justification."
-                } for sq in scenario_data["sub_questions"]
+                    "part": sq.part,
+                    "answer": f"[Model answer for part {sq.part} would be provided here with detailed explanation and calculations]",
+                    "rubric": f"Award {sq.points} points for comprehensive answer addressing all key concepts with proper justification."
+                } for sq in sub_questions
             ]
-        }
+        )
         questions.append(question)
     
     return questions
@@ -137,98 +127,20 @@ def generate_standard_pm_questions():
     if not st.session_state.processed_content:
         return []
     
-    chunks_by_topic = st.session_state.processed_content['chunks_by_topic']
+    content = st.session_state.processed_content
+    topic_chunks = content['_topic_chunks']
     item_sets = []
     
     # Select 5 different topics
-    available_topics = list(chunks_by_topic.keys())
+    available_topics = content['_topics']
     selected_topics = random.sample(available_topics, min(5, len(available_topics)))
     
-    pm_vignettes = {
-        "Asset Allocation": {
-            "vignette": "Global Pension Advisors (GPA) manages a $10 billion pension fund for a large corporation. The fund's current allocation is 55% equities, 35% bonds, and 10% alternatives. The fund has a 15-year investment horizon and moderate risk tolerance. GPA is considering implementing a liability-driven investment (LDI) approach.",
-            "questions": [
-                {
-                    "question_text": "Which asset allocation approach would be most appropriate for implementing an LDI strategy?",
-                    "options": {
-                        "A": "Increase equity allocation to 70% for higher expected returns",
-                        "B": "Match asset duration to liability duration and hedge interest rate risk",
-                        "C": "Implement tactical asset allocation based on market timing",
-                        "D": "Focus solely on maximizing absolute returns"
-                    },
-                    "correct_answer": "B",
-                    "explanation": "LDI focuses on matching assets to liabilities, particularly duration matching and interest rate hedging."
-                },
-                {
-                    "question_text": "The primary benefit of strategic asset allocation is:",
-                    "options": {
-                        "A": "Maximizing short-term returns",
-                        "B": "Providing a long-term framework for achieving investment objectives",
-                        "C": "Eliminating all portfolio risk",
-                        "D": "Guaranteeing outperformance of benchmarks"
-                    },
-                    "correct_answer": "B",
-                    "explanation": "Strategic asset allocation provides the long-term framework aligned with investment objectives and constraints."
-                },
-                {
-                    "question_text": "When rebalancing a strategic asset allocation, the most important consideration is:",
-                    "options": {
-                        "A": "Market timing opportunities",
-                        "B": "Transaction costs and tax implications",
-                        "C": "Short-term performance relative to peers",
-                        "D": "Manager selection decisions"
-                    },
-                    "correct_answer": "B",
-                    "explanation": "Rebalancing decisions must consider transaction costs and tax implications to ensure net benefits."
-                }
-            ]
-        },
-        "Portfolio Construction": {
-            "vignette": "Systematic Investment Management (SIM) is developing a multi-factor equity strategy targeting value, momentum, and quality factors. The strategy will use a quantitative approach to construct portfolios with controlled risk exposures.",
-            "questions": [
-                {
-                    "question_text": "The value factor is most likely to outperform when:",
-                    "options": {
-                        "A": "Interest rates are declining rapidly",
-                        "B": "Economic growth is accelerating from recession",
-                        "C": "Market volatility is at historic lows",
-                        "D": "Technology stocks are leading market gains"
-                    },
-                    "correct_answer": "B",
-                    "explanation": "Value stocks typically outperform during economic recoveries when their fundamentals improve."
-                },
-                {
-                    "question_text": "A key challenge in factor investing is:",
-                    "options": {
-                        "A": "Factors always provide positive returns",
-                        "B": "Factor premiums can experience long periods of underperformance",
-                        "C": "Factors are perfectly correlated with each other",
-                        "D": "Factor strategies have no implementation costs"
-                    },
-                    "correct_answer": "B",
-                    "explanation": "Factor premiums can underperform for extended periods, testing investor patience."
-                },
-                {
-                    "question_text": "When constructing a multi-factor portfolio, the most important consideration is:",
-                    "options": {
-                        "A": "Maximizing exposure to the highest returning factor",
-                        "B": "Balancing factor exposures while managing correlations",
-                        "C": "Minimizing the number of holdings",
-                        "D": "Focusing only on momentum factors"
-                    },
-                    "correct_answer": "B",
-                    "explanation": "Multi-factor portfolios require balancing exposures and managing correlations between factors."
-                }
-            ]
-        }
-    }
-    
     for i, topic in enumerate(selected_topics, 1):
-        if topic in pm_vignettes:
-            vignette_data = pm_vignettes[topic]
+        if topic in PM_VIGNETTES:
+            vignette_data = PM_VIGNETTES[topic]
         else:
             # Default vignette for other topics
-            chunk = random.choice(chunks_by_topic[topic])
+            chunk = random.choice(topic_chunks[topic])
             vignette_data = {
                 "vignette": f"Case Study: {chunk['content'][:400]}...",
                 "questions": [
@@ -268,20 +180,30 @@ def generate_standard_pm_questions():
                 ]
             }
         
-        # Add question numbers to each MCQ
-        for j, q in enumerate(vignette_data["questions"], 1):
-            q["question_number"] = (i-1) * 3 + j
-            q["points"] = 6
+        # Number each MCQ (new records, so the shared vignettes stay untouched)
+        mcqs = [
+            MCQ(
+                question_number=(i-1) * 3 + j,
+                question_text=q["question_text"],
+                options=q["options"],
+                correct_answer=q["correct_answer"],
+                explanation=q["explanation"],
+                points=6,
+                widget_key=f"mcq_{(i-1) * 3 + j}",
+                option_labels={k: f"{k}. {v}" for k, v in q["options"].items()}
+            )
+            for j, q in enumerate(vignette_data["questions"], 1)
+        ]
         
-        item_set = {
-            "item_set_id": f"PM_Set{i}_{topic.replace(' ', '_')}",
-            "set_number": i,
-            "topic": topic,
-            "vignette": vignette_data["vignette"],
-            "questions": vignette_data["questions"],
-            "total_points": 18,
-            "estimated_time_minutes": 36
-        }
+        item_set = ItemSet(
+            item_set_id=f"PM_Set{i}_{topic.replace(' ', '_')}",
+            set_number=i,
+            topic=topic,
+            vignette=vignette_data["vignette"],
+            questions=mcqs,
+            total_points=18,
+            estimated_time_minutes=36
+        )
         item_sets.append(item_set)
     
     return item_sets
@@ -302,7 +224,8 @@ def build_standard_exam(session_type):
             "created_at": datetime.now().isoformat(),
             "total_questions": len(questions),
             "total_time_minutes": total_time,
-            "total_points": sum([q.get('total_points', 18) for q in questions]),
+            "_total_seconds": total_time * 60,
+            "total_points": sum(q.total_points for q in questions),
             "questions": questions,
             "instructions": [
                 f"CFA Level III {session_type} Session",
@@ -313,9 +236,50 @@ def build_standard_exam(session_type):
             ]
         }
         
+        # Answers are stored by position: pm_answers[i] for the i-th MCQ,
+        # am_answers[q][p] for part p of question q
+        if session_type == "PM":
+            exam["_pm_flat"] = _flatten_pm_questions(questions)
+            st.session_state.pm_answers = [""] * len(exam["_pm_flat"]["qnums"])
+        else:
+            st.session_state.am_answers = [[""] * len(q.sub_questions) for q in questions]
+        
         st.session_state.current_exam = exam
         return exam
 
+def _flatten_pm_questions(item_sets):
+    """Parallel per-MCQ tuples so grading can compare answers in one vectorized pass"""
+    mcqs = [(item_set, mcq) for item_set in item_sets for mcq in item_set.questions]
+    return {
+        "qnums": tuple(mcq.question_number for _, mcq in mcqs),
+        "widget_keys": tuple(mcq.widget_key for _, mcq in mcqs),
+        "correct": tuple(mcq.correct_answer for _, mcq in mcqs),
+        "points": tuple(mcq.points for _, mcq in mcqs),
+        "topics": tuple(item_set.topic for item_set, _ in mcqs),
+        "explanations": tuple(mcq.explanation for _, mcq in mcqs)
+    }
+
+@st.fragment(run_every="1s")
+def _render_timer(exam):
+    """Live countdown; only this fragment reruns each tick, not the question widgets"""
+    # Plain float seconds; start_time comes from time.monotonic()
+    elapsed = time.monotonic() - st.session_state.start_time
+    remaining = exam["_total_seconds"] - elapsed
+    
+    if remaining <= 0:
+        # Form widgets only commit on a submit, so this grades the answers
+        # as of the last Save Draft (manual or the periodic one below)
+        st.error("⏰ Time's up! Exam automatically submitted.")
+        collect_answers(exam)
+        st.session_state.exam_submitted = True
+        st.rerun()
+    
+    # Display timer
+    minutes, seconds = divmod(int(remaining), 60)
+    hours, minutes = divmod(minutes, 60)
+    st.markdown(f"### ⏰ Time Remaining: {hours}:{minutes:02d}:{seconds:02d}")
+    st.progress(min(elapsed / exam["_total_seconds"], 1.0))
+
 def display_exam_interface():
     """Display the actual exam taking interface"""
     exam = st.session_state.current_exam
@@ -323,62 +287,87 @@ def display_exam_interface():
     
     # Timer
     if st.session_state.start_time:
-        elapsed = datetime.now() - st.session_state.start_time
-        remaining = timedelta(minutes=exam["total_time_minutes"]) - elapsed
-        
-        if remaining.total_seconds() <= 0:
-            st.error("⏰ Time's up! Exam automatically submitted.")
-            st.session_state.exam_submitted = True
-            return
-        
-        # Display timer
-        st.markdown(f"### ⏰ Time Remaining: {str(remaining).split('.')[0]}")
-        progress = elapsed.total_seconds() / (exam["total_time_minutes"] * 60)
-        st.progress(min(progress, 1.0))
+        _render_timer(exam)
     
     st.markdown("---")
     
-    if session == "AM":
-        display_am_exam()
-    else:
-        display_pm_exam()
-    
-    # Submit button
-    if st.button("📤 Submit Exam", type="primary"):
+    # Answers are batched in a form so typing doesn't rerun the whole script;
+    # Save Draft commits them without submitting the exam
+    with st.form("exam_form", clear_on_submit=False):
+        if session == "AM":
+            display_am_exam()
+        else:
+            display_pm_exam()
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            draft_saved = st.form_submit_button("💾 Save Draft")
+        with col2:
+            submitted = st.form_submit_button("📤 Submit Exam", type="primary")
+    
+    # Click Save Draft periodically so a timeout loses at most one interval of typing;
+    # the markup never changes, so reruns do not remount the iframe
+    st.components.v1.html(f"""
+    <script>
+    setInterval(function() {{
+        try {{
+            for (const button of window.parent.document.querySelectorAll('button')) {{
+                if (button.innerText.includes('Save Draft')) {{
+                    button.click();
+                    return;
+                }}
+            }}
+        }} catch (e) {{}}
+    }}, {DRAFT_SAVE_SECONDS * 1000});
+    </script>
+    """, height=0)
+    
+    if draft_saved:
+        collect_answers(exam)
+        st.success("💾 Draft saved")
+    
+    if submitted:
+        collect_answers(exam)
         st.session_state.exam_submitted = True
         st.success("✅ Exam submitted!")
         st.balloons()
 
+def collect_answers(exam):
+    """Copy the exam's widget values into the positional answer lists"""
+    if exam["session"] == "AM":
+        st.session_state.am_answers = [
+            [st.session_state.get(sub_q.widget_key, "") for sub_q in question.sub_questions]
+            for question in exam["questions"]
+        ]
+    else:
+        st.session_state.pm_answers = [
+            st.session_state.get(key) or "" for key in exam["_pm_flat"]["widget_keys"]
+        ]
+
 def display_am_exam():
     """Display AM constructed response questions"""
     exam = st.session_state.current_exam
     
     for question in exam["questions"]:
-        st.subheader(f"Question {question['question_number']} - {question['topic']} ({question['total_points']} points)")
+        st.subheader(f"Question {question.question_number} - {question.topic} ({question.total_points} points)")
         
         # Scenario
         st.markdown("**Scenario:**")
-        st.write(question["scenario"])
+        st.write(question.scenario)
         st.markdown("---")
         
         # Sub-questions
-        for sub_q in question["sub_questions"]:
-            st.markdown(f"**{sub_q['part']}.** {sub_q['question']} *({sub_q['points']} points)*")
+        for sub_q in question.sub_questions:
+            st.markdown(f"**{sub_q.part}.** {sub_q.question} *({sub_q.points} points)*")
             
             # Answer input
-            answer_key = f"q{question['question_number']}_{sub_q['part']}"
-            answer = st.text_area(
-                f"Your answer for {sub_q['part']}:",
-                key=answer_key,
+            st.text_area(
+                f"Your answer for {sub_q.part}:",
+                key=sub_q.widget_key,
                 height=150,
                 placeholder="Provide your detailed answer here..."
             )
             
-            # Store answer
-            if answer_key not in st.session_state.user_answers:
-                st.session_state.user_answers[answer_key] = ""
-            st.session_state.user_answers[answer_key] = answer
-            
             st.markdown("---")
 
 def display_pm_exam():
@@ -386,29 +375,25 @@ def display_pm_exam():
     exam = st.session_state.current_exam
     
     for item_set in exam["questions"]:
-        st.subheader(f"Item Set {item_set['set_number']} - {item_set['topic']}")
+        st.subheader(f"Item Set {item_set.set_number} - {item_set.topic}")
         
         # Vignette
         st.markdown("**Case Study:**")
-        st.write(item_set["vignette"])
+        st.write(item_set.vignette)
         st.markdown("---")
         
         # Questions
-        for mcq in item_set["questions"]:
-            st.markdown(f"**{mcq['question_number']}.** {mcq['question_text']}")
+        for mcq in item_set.questions:
+            st.markdown(f"**{mcq.question_number}.** {mcq.question_text}")
             
             # Options
-            answer_key = f"mcq_{mcq['question_number']}"
-            selected = st.radio(
-                f"Select answer for question {mcq['question_number']}:",
-                options=list(mcq['options'].keys()),
-                key=answer_key,
-                format_func=lambda x: f"{x}. {mcq['options'][x]}"
+            st.radio(
+                f"Select answer for question {mcq.question_number}:",
+                options=list(mcq.options.keys()),
+                key=mcq.widget_key,
+                format_func=mcq.option_labels.get
             )
             
-            # Store answer
-            st.session_state.user_answers[answer_key] = selected
-            
         st.markdown("---")
 
 def grade_exam():
@@ -424,37 +409,35 @@ def grade_exam():
 def grade_pm_exam():
     """Grade PM multiple choice exam"""
     exam = st.session_state.current_exam
-    total_questions = 0
-    correct_answers = 0
-    total_points = 0
-    earned_points = 0
-    detailed_results = []
+    flat = exam["_pm_flat"]
     
-    for item_set in exam["questions"]:
-        for mcq in item_set["questions"]:
-            total_questions += 1
-            total_points += mcq["points"]
-            
-            answer_key = f"mcq_{mcq['question_number']}"
-            user_answer = st.session_state.user_answers.get(answer_key, "")
-            correct_answer = mcq["correct_answer"]
-            
-            is_correct = user_answer == correct_answer
-            points_earned = mcq["points"] if is_correct else 0
-            
-            if is_correct:
-                correct_answers += 1
-                earned_points += points_earned
-            
-            detailed_results.append({
-                "question_number": mcq["question_number"],
-                "topic": item_set["topic"],
-                "user_answer": user_answer,
-                "correct_answer": correct_answer,
-                "is_correct": is_correct,
-                "points_earned": points_earned,
-                "explanation": mcq["explanation"]
-            })
+    user = np.array(st.session_state.pm_answers, dtype="U1")
+    correct = np.array(flat["correct"], dtype="U1")
+    points = np.array(flat["points"], dtype=np.int64)
+    
+    is_correct = user == correct
+    points_earned = np.where(is_correct, points, 0)
+    
+    total_questions = len(flat["qnums"])
+    correct_answers = int(is_correct.sum())
+    total_points = int(points.sum())
+    earned_points = int(points_earned.sum())
+    
+    detailed_results = [
+        {
+            "question_number": qnum,
+            "topic": topic,
+            "user_answer": user_answer,
+            "correct_answer": correct_answer,
+            "is_correct": bool(ok),
+            "points_earned": int(earned),
+            "explanation": explanation
+        }
+        for qnum, topic, user_answer, correct_answer, ok, earned, explanation in zip(
+            flat["qnums"], flat["topics"], user.tolist(), flat["correct"],
+            is_correct, points_earned, flat["explanations"]
+        )
+    ]
     
     percentage = (earned_points / total_points * 100) if total_points > 0 else 0
     
@@ -472,7 +455,7 @@ def grade_pm_exam():
 def grade_am_exam():
     """Grade AM constructed response exam (simplified)"""
     exam = st.session_state.current_exam
-    total_points = sum([q["total_points"] for q in exam["questions"]])
+    total_points = exam["total_points"]
     
     # Simplified grading - in real implementation would use AI
     estimated_score = random.randint(60, 85)  # Placeholder
@@ -519,18 +502,18 @@ def display_results():
                     st.write(f"**Explanation:** {result['explanation']}")
 
 def main():
-    initialize_session_state()
+    # Defaults only need filling once per session, not on every rerun
+    if not st.session_state.get('_init_done'):
+        initialize_session_state()
+        st.session_state._init_done = True
     
     st.title("🎓 CFA Level III Mock Exam Generator")
     st.markdown("**Complete Exam System** - Following CFA Standards")
     
     # Show content source clearly
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("📚 Content Source")
+    st.sidebar.markdown(CONTENT_SOURCE_HEADER_MD)
     if st.session_state.processed_content:
-        st.sidebar.warning("📄 Using Sample Content")
-        st.sidebar.write("Questions from pre-loaded CFA material")
-        st.sidebar.write("(Not from your uploaded books)")
+        st.sidebar.warning(SAMPLE_CONTENT_MD)
     else:
         st.sidebar.info("📤 No content loaded")
     
@@ -541,19 +524,8 @@ def main():
     # Show CFA standards
     with st.expander("📋 CFA Level III Exam Format"):
         col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**AM Session (Morning)**")
-            st.write("• 4 constructed response questions")
-            st.write("• 180 minutes (3 hours)")
-            st.write("• 45 minutes per question")
-            st.write("• Essay format with calculations")
-        
-        with col2:
-            st.markdown("**PM Session (Afternoon)**")
-            st.write("• 5 item sets (case studies)")
-            st.write("• 3 MCQs per item set (15 total)")
-            st.write("• 180 minutes (3 hours)")
-            st.write("• 36 minutes per item set")
+        col1.markdown(AM_FORMAT_MD)
+        col2.markdown(PM_FORMAT_MD)
     
     st.markdown("---")
     
@@ -590,7 +562,7 @@ def main():
         
         if st.button("🚀 Start Exam", type="primary"):
             st.session_state.exam_started = True
-            st.session_state.start_time = datetime.now()
+            st.session_state.start_time = time.monotonic()
             st.rerun()
     
     elif not st.session_state.exam_submitted:
@@ -610,7 +582,8 @@ def main():
             st.session_state.current_exam = None
             st.session_state.exam_started = False
             st.session_state.start_time = None
-            st.session_state.user_answers = {}
+            st.session_state.am_answers = []
+            st.session_state.pm_answers = []
             st.session_state.exam_submitted = False
             st.session_state.grading_results = None
             st.rerun()
@@ -0,0 +1,17 @@
+"""
+Sidebar pages of the main Streamlit app (app.py)
+"""
+
+# Sidebar labels keyed by a stable page key, so relabeling never breaks routing
+PAGE_LABELS = {
+    "upload": "📚 PDF Upload & Processing",
+    "generate": "🔧 Question Generation",
+    "build": "📝 Exam Builder",
+    "exam": "⏱️ Take Exam",
+    "results": "📊 Results & Analysis",
+    "export": "📄 Export Options"
+}
+
+# Imported modules are cached, so this is built once per process rather than
+# on every rerun of the entry script
+PAGE_KEYS = tuple(PAGE_LABELS)
@@ -1,6 +1,28 @@
 """
 CFA Level III topic configuration and weights
 """
+import re
+import sys
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import List
+
+import numpy as np
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+try:
+    import hyperscan
+    HYPERSCAN_AVAILABLE = True
+except ImportError:
+    HYPERSCAN_AVAILABLE = False
 
 # CFA Level III Topic Weights
 TOPIC_WEIGHTS = {
@@ -12,63 +34,267 @@ TOPIC_WEIGHTS = {
     "Portfolio Management Pathway": {"min": 30, "max": 35, "target": 32.5}
 }
 
-# Topic keywords for classification
+def _intern_keys(mapping: dict) -> dict:
+    """Rebuild a dict with interned string keys so lookups hit the identity fast path"""
+    return {sys.intern(key): value for key, value in mapping.items()}
+
+TOPIC_WEIGHTS = _intern_keys(TOPIC_WEIGHTS)
+
+# Structure-of-arrays view of TOPIC_WEIGHTS for vectorized range checks
+TOPIC_NAMES = tuple(TOPIC_WEIGHTS)
+TOPIC_INDEX = {topic: i for i, topic in enumerate(TOPIC_NAMES)}
+
+# Weights are all whole tenths of a percent, so store them as exact int16
+# tenths (e.g. 17.5% -> 175)
+def _tenths(field: str) -> np.ndarray:
+    return np.fromiter((round(TOPIC_WEIGHTS[t][field] * 10) for t in TOPIC_NAMES), dtype=np.int16)
+
+TOPIC_MIN_DT = _tenths("min")
+TOPIC_MAX_DT = _tenths("max")
+TOPIC_TARGET_DT = _tenths("target")
+
+TARGET_SUM = int(TOPIC_TARGET_DT.sum()) / 10.0
+
+# The weights are fixed for the process lifetime, so check their invariants once here
+if not np.all((TOPIC_MIN_DT <= TOPIC_TARGET_DT) & (TOPIC_TARGET_DT <= TOPIC_MAX_DT)):
+    raise ValueError("Every topic target must lie within its min/max range")
+if not 99.9 <= TARGET_SUM <= 100.1:
+    raise ValueError(f"Topic targets must sum to 100%, got {TARGET_SUM}")
+
+# Topic keywords for classification, stored lowercase to match lowered text
 TOPIC_KEYWORDS = {
-    "Asset Allocation": [
+    "Asset Allocation": (
         "asset allocation", "strategic allocation", "tactical allocation", "mean-variance optimization",
-        "efficient frontier", "risk budgeting", "liability-driven investing", "ALM", "asset-liability matching",
+        "efficient frontier", "risk budgeting", "liability-driven investing", "alm", "asset-liability matching",
         "rebalancing", "portfolio optimization", "capital market expectations", "monte carlo simulation"
-    ],
-    "Portfolio Construction": [
+    ),
+    "Portfolio Construction": (
         "portfolio construction", "factor investing", "smart beta", "alternative investments",
         "private equity", "hedge funds", "real estate", "commodities", "currency management",
         "overlay strategies", "completion portfolios", "core-satellite", "barbell strategy"
-    ],
-    "Performance Management": [
-        "performance measurement", "performance attribution", "GIPS", "benchmarking",
+    ),
+    "Performance Management": (
+        "performance measurement", "performance attribution", "gips", "benchmarking",
         "risk-adjusted returns", "sharpe ratio", "information ratio", "tracking error",
         "alpha", "beta", "performance evaluation", "attribution analysis", "appraisal ratio"
-    ],
-    "Derivatives & Risk Management": [
+    ),
+    "Derivatives & Risk Management": (
         "derivatives", "options", "futures", "swaps", "forwards", "risk management",
-        "hedging", "VaR", "value at risk", "credit risk", "market risk", "operational risk",
+        "hedging", "var", "value at risk", "credit risk", "market risk", "operational risk",
         "stress testing", "scenario analysis", "tail risk", "downside protection"
-    ],
-    "Ethics & Professional Standards": [
+    ),
+    "Ethics & Professional Standards": (
         "ethics", "professional standards", "code of ethics", "standards of professional conduct",
         "fiduciary duty", "conflicts of interest", "material nonpublic information", "fair dealing",
         "suitability", "performance presentation", "compliance", "investment management process"
-    ],
-    "Portfolio Management Pathway": [
+    ),
+    "Portfolio Management Pathway": (
         "institutional portfolio management", "individual portfolio management", "wealth management",
         "pension funds", "endowments", "foundations", "insurance companies", "banks",
         "sovereign wealth funds", "family offices", "high net worth", "retirement planning",
         "estate planning", "tax considerations", "behavioral finance", "client management"
-    ]
+    )
+}
+
+TOPIC_KEYWORDS = _intern_keys({
+    topic: tuple(sys.intern(keyword) for keyword in keywords)
+    for topic, keywords in TOPIC_KEYWORDS.items()
+})
+
+# Inverted keyword index, built once at import. The matchers below carry the
+# topic id as their payload, so only the regex fallback looks keywords up here.
+_keyword_topic_ids = {
+    keyword: TOPIC_INDEX[topic]
+    for topic, keywords in TOPIC_KEYWORDS.items()
+    for keyword in keywords
 }
 
+# Read-only public views; the keyword set is fixed for the process lifetime
+KEYWORD_TO_TOPIC = MappingProxyType({keyword: TOPIC_NAMES[i] for keyword, i in _keyword_topic_ids.items()})
+KEYWORD_TO_TOPIC_ID = MappingProxyType(_keyword_topic_ids)
+
+def _trie_pattern(words) -> str:
+    """Build a regex alternation with shared prefixes factored into a trie"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def emit(node: dict) -> str:
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if "" in node:
+            branches.append("")
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    return emit(trie)
+
+@lru_cache(maxsize=None)
+def _keyword_regex() -> re.Pattern:
+    """Compile the combined keyword regex on first use; never built when the automaton is present"""
+    # Prefix-factored alternation inside a lookahead, so overlapping phrases
+    # ("performance attribution analysis") each count once
+    return re.compile(r"\b(?=(" + _trie_pattern(KEYWORD_TO_TOPIC) + r")\b)")
+
+_is_word_char = re.compile(r"\w").match
+
+def _build_automaton():
+    """Aho-Corasick automaton over every keyword, for a single pass per text"""
+    automaton = ahocorasick.Automaton()
+    for keyword, topic_id in KEYWORD_TO_TOPIC_ID.items():
+        automaton.add_word(keyword, (len(keyword), topic_id))
+    automaton.make_automaton()
+    return automaton
+
+# Hyperscan pattern id -> (keyword, topic id)
+_HS_PATTERNS = tuple(KEYWORD_TO_TOPIC_ID.items())
+_HS_LOCK = threading.Lock()  # a database shares one scratch space, so scans must not overlap
+
+def _build_hyperscan_db():
+    """Hyperscan literal database over every keyword, for a SIMD-accelerated single pass"""
+    database = hyperscan.Database()
+    database.compile(
+        expressions=[re.escape(keyword).encode("utf-8") for keyword, _ in _HS_PATTERNS],
+        ids=list(range(len(_HS_PATTERNS))),
+        flags=[0] * len(_HS_PATTERNS)
+    )
+    return database
+
+# Prefer Hyperscan, then Aho-Corasick, then the combined regex
+KEYWORD_DATABASE = _build_hyperscan_db() if HYPERSCAN_AVAILABLE else None
+KEYWORD_AUTOMATON = _build_automaton() if AHOCORASICK_AVAILABLE and KEYWORD_DATABASE is None else None
+
+def _on_hyperscan_match(pattern_id: int, start: int, end: int, flags: int, hits: list):
+    hits.append((pattern_id, end))
+
+def _char_before(data: bytes, i: int) -> str:
+    j = i - 1
+    while j > 0 and data[j] & 0xC0 == 0x80:
+        j -= 1
+    return data[j:i].decode("utf-8", "surrogatepass")
+
+def _score_with_hyperscan(text_lower: str, topic_scores: list):
+    """Tally keyword hits in one Hyperscan pass, keeping only whole-word matches"""
+    # Hyperscan has no Unicode \b, so boundaries are checked here. Keywords are
+    # ASCII, so match offsets always fall on character boundaries.
+    data = text_lower.encode("utf-8", "surrogatepass")
+    hits = []
+    with _HS_LOCK:
+        KEYWORD_DATABASE.scan(data, match_event_handler=_on_hyperscan_match, context=hits)
+    
+    for pattern_id, end in hits:
+        keyword, topic_id = _HS_PATTERNS[pattern_id]
+        start = end - len(keyword)
+        if start > 0 and _is_word_char(_char_before(data, start)):
+            continue
+        if end < len(data) and _is_word_char(data[end:end + 4].decode("utf-8", "ignore")[:1]):
+            continue
+        topic_scores[topic_id] += 1
+
+def _score_with_automaton(text_lower: str, topic_scores: list):
+    """Tally keyword hits in one automaton pass, keeping only whole-word matches"""
+    last = len(text_lower) - 1
+    for end, (length, topic_id) in KEYWORD_AUTOMATON.iter(text_lower):
+        start = end - length + 1
+        if start > 0 and _is_word_char(text_lower[start - 1]):
+            continue
+        if end < last and _is_word_char(text_lower[end + 1]):
+            continue
+        topic_scores[topic_id] += 1
+
+def _score_with_regex(text_lower: str, topic_scores: list):
+    """Tally keyword hits in one pass of the combined keyword regex"""
+    # Counter tallies in C, leaving one id lookup per distinct keyword
+    for keyword, hits in Counter(_keyword_regex().findall(text_lower)).items():
+        topic_scores[_keyword_topic_ids[keyword]] += hits
+
+@lru_cache(maxsize=4096)
+def classify_topic(text: str) -> str:
+    """Classify text into the topic with the most keyword hits, or "General" if none match"""
+    text_lower = text.lower()
+    # Tally by topic id so the hot loop indexes a small list instead of hashing names
+    topic_scores = [0] * len(TOPIC_NAMES)
+    
+    if KEYWORD_DATABASE is not None:
+        _score_with_hyperscan(text_lower, topic_scores)
+    elif KEYWORD_AUTOMATON is not None:
+        _score_with_automaton(text_lower, topic_scores)
+    else:
+        _score_with_regex(text_lower, topic_scores)
+    
+    best = max(range(len(topic_scores)), key=topic_scores.__getitem__)
+    if topic_scores[best] > 0:
+        return TOPIC_NAMES[best]
+    return "General"
+
 # Question types and formats
+@dataclass(frozen=True, slots=True)
+class QuestionType:
+    type: str
+    count_min: int
+    count_max: int
+    time_minutes: int
+    format: str
+    answer_format: str
+    questions_per_set: int = 0
+
+@dataclass(frozen=True, slots=True)
+class DifficultyLevel:
+    weight: float
+    description: str
+
 QUESTION_TYPES = {
-    "AM": {
-        "type": "constructed_response",
-        "count": {"min": 3, "max": 5},
-        "time_minutes": 180,
-        "format": "essay_with_calculations",
-        "answer_format": "bullet_points_with_rubric"
-    },
-    "PM": {
-        "type": "item_set",
-        "count": {"min": 4, "max": 6},
-        "time_minutes": 180,
-        "questions_per_set": 3,
-        "format": "multiple_choice",
-        "answer_format": "detailed_explanations"
-    }
+    "AM": QuestionType(
+        type="constructed_response",
+        count_min=3,
+        count_max=5,
+        time_minutes=180,
+        format="essay_with_calculations",
+        answer_format="bullet_points_with_rubric"
+    ),
+    "PM": QuestionType(
+        type="item_set",
+        count_min=4,
+        count_max=6,
+        time_minutes=180,
+        questions_per_set=3,
+        format="multiple_choice",
+        answer_format="detailed_explanations"
+    )
 }
 
 # Difficulty levels
 DIFFICULTY_LEVELS = {
-    "Level_1": {"weight": 0.2, "description": "Basic recall and understanding"},
-    "Level_2": {"weight": 0.5, "description": "Application and analysis"},
-    "Level_3": {"weight": 0.3, "description": "Synthesis and evaluation"}
+    "Level_1": DifficultyLevel(weight=0.2, description="Basic recall and understanding"),
+    "Level_2": DifficultyLevel(weight=0.5, description="Application and analysis"),
+    "Level_3": DifficultyLevel(weight=0.3, description="Synthesis and evaluation")
 }
+
+def build_alias_table(weights) -> tuple:
+    """Walker-Vose alias table: (probability, alias) arrays for O(1) weighted draws"""
+    n = len(weights)
+    scaled = np.asarray(weights, dtype=np.float64) * n / np.sum(weights)
+    prob = np.ones(n, dtype=np.float64)
+    alias = np.arange(n, dtype=np.intp)
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        (small if scaled[l] < 1.0 else large).append(l)
+    return prob, alias
+
+DIFFICULTY_NAMES = tuple(DIFFICULTY_LEVELS)
+_ALIAS_PROB, _ALIAS_IDX = build_alias_table([level.weight for level in DIFFICULTY_LEVELS.values()])
+
+def sample_difficulties(k: int, rng: np.random.Generator = None) -> List[str]:
+    """Draw k difficulty levels by weight using the precomputed alias table"""
+    rng = rng or np.random.default_rng()
+    picks = rng.integers(len(DIFFICULTY_NAMES), size=k)
+    picks = np.where(rng.random(k) < _ALIAS_PROB[picks], picks, _ALIAS_IDX[picks])
+    return [DIFFICULTY_NAMES[i] for i in picks]
@@ -1,17 +1,27 @@
 import streamlit as st
-import json
+import asyncio
+import gzip
+import hashlib
+import orjson
 import os
 import pickle
 from datetime import datetime, timedelta
 import random
+import time
 from pathlib import Path
 
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
 # Import our PDF processor and content loader
 try:
     import sys
     sys.path.append('.')
     from src.pdf_processor import CFAPDFProcessor
-    from src.content_loader import load_preprocessed_content, ensure_chunks_by_topic, get_content_summary
+    from src.content_loader import get_cfa_content, get_content_summary
     PDF_PROCESSOR_AVAILABLE = True
     CONTENT_LOADER_AVAILABLE = True
 except ImportError as e:
@@ -34,54 +44,227 @@ PROCESSED_DIR = "data/processed"
 os.makedirs(STORAGE_DIR, exist_ok=True)
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+# Answer edits go to an append-only log; the full session snapshot is only
+# rewritten every few edits or after a quiet period
+SNAPSHOT_EVERY_N_ANSWERS = 5
+SNAPSHOT_DEBOUNCE_SECONDS = 3.0
+SESSION_LOCK_TIMEOUT_SECONDS = 10.0
+
+# Form answers only reach the server on a submit, so the timer page clicks
+# Save Answers on this interval (and once more when time runs out)
+DRAFT_SAVE_SECONDS = 60
+
+# Snapshots are gzip JSON by default. Pickle is faster but unpickling runs
+# arbitrary code from the file, so only enable it when STORAGE_DIR is
+# writable by this app alone (pickle snapshots are ignored while disabled)
+SESSION_SNAPSHOT_PICKLE = False
+
+# Processed corpus files; the first one present names the corpus
+PROCESSED_MANIFEST_FILE = f"{PROCESSED_DIR}/financial_books_manifest.json"
+MANIFEST_SCHEMA_VERSION = 1
+
+PROCESSED_CONTENT_FILES = (
+    f"{PROCESSED_DIR}/financial_books_content.json.gz",
+    f"{PROCESSED_DIR}/financial_books_content.json"
+)
+
 def get_session_id():
-    """Get or create a unique session ID"""
+    """Get or create a unique session ID, along with its storage paths"""
     if 'session_id' not in st.session_state:
-        st.session_state.session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
+        session_id = f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}"
+        snapshot_ext = 'pkl' if SESSION_SNAPSHOT_PICKLE else 'json'
+        st.session_state.session_id = session_id
+        st.session_state.session_file = Path(STORAGE_DIR) / f"{session_id}.{snapshot_ext}.gz"
+        st.session_state.answers_file = Path(STORAGE_DIR) / f"{session_id}.answers.jsonl"
     return st.session_state.session_id
 
+def processed_content_ref():
+    """Point at the on-disk processed corpus (path + mtime) instead of embedding it"""
+    existing = [path for path in PROCESSED_CONTENT_FILES if os.path.exists(path)]
+    if not existing:
+        return None
+    # The loader may read either file, so a change to any of them is a new version
+    return {'path': existing[0], 'mtime': max(os.path.getmtime(path) for path in existing)}
+
+@st.cache_resource(max_entries=1)
+def get_processed_content(path, mtime):
+    """Parse the processed corpus once per file version when the content loader is unavailable"""
+    with open(path, 'rb') as f:
+        payload = f.read()
+    if path.endswith('.gz'):
+        payload = gzip.decompress(payload)
+    content = orjson.loads(payload)
+    
+    if content and 'chunks_by_topic' in content:
+        content['topic_keys'] = tuple(content['chunks_by_topic'])
+    return content
+
+def load_corpus():
+    """Shared, read-only processed corpus for the current on-disk version, or None"""
+    ref = processed_content_ref()
+    if ref is None:
+        return None
+    if CONTENT_LOADER_AVAILABLE:
+        return get_cfa_content(ref['mtime'])
+    return get_processed_content(ref['path'], ref['mtime'])
+
+def acquire_file_lock(f, timeout=SESSION_LOCK_TIMEOUT_SECONDS):
+    """Take an exclusive flock on f, retrying until timeout (no-op where fcntl is unavailable)"""
+    if not FCNTL_AVAILABLE:
+        return
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out waiting for lock on {f.name}")
+            time.sleep(0.05)
+
+def session_fingerprint():
+    """Cheap hash of the fields that change a saved snapshot, or None if unhashable"""
+    exam = st.session_state.get('current_exam')
+    try:
+        return hash((
+            exam.get('exam_id') if exam else None,
+            st.session_state.get('processed_content_loaded', False),
+            st.session_state.get('exam_started', False),
+            st.session_state.get('exam_submitted', False),
+            st.session_state.get('start_time'),
+            st.session_state.get('grading_results') is not None,
+            frozenset(st.session_state.get('user_answers', {}).items())
+        ))
+    except TypeError:
+        return None
+
 def save_session_data():
     """Save current session data to file for persistence"""
+    # Reruns that change nothing (sidebar widgets, repeated saves) skip the disk write
+    fingerprint = session_fingerprint()
+    if fingerprint is not None and fingerprint == st.session_state.get('_last_saved_hash'):
+        return True
+    
     session_id = get_session_id()
-    session_file = f"{STORAGE_DIR}/{session_id}.json"
+    session_file = st.session_state.session_file
     
     session_data = {
         'session_id': session_id,
-        'processed_content': st.session_state.get('processed_content'),
+        'processed_content_ref': processed_content_ref() if st.session_state.get('processed_content_loaded') else None,
         'current_exam': st.session_state.get('current_exam'),
         'exam_started': st.session_state.get('exam_started', False),
-        'start_time': st.session_state.get('start_time').isoformat() if st.session_state.get('start_time') else None,
+        'start_time': st.session_state.get('start_time'),
         'user_answers': st.session_state.get('user_answers', {}),
         'exam_submitted': st.session_state.get('exam_submitted', False),
         'grading_results': st.session_state.get('grading_results'),
-        'last_saved': datetime.now().isoformat()
+        'last_saved': datetime.now()
     }
     
     try:
-        with open(session_file, 'w') as f:
-            json.dump(session_data, f, indent=2)
+        # Serialize overlapping reruns for this session, then write a temp file
+        # and swap it in so an interrupted save never leaves a truncated snapshot
+        with open(session_file.with_name(f"{session_file.name}.lock"), 'wb') as lock:
+            acquire_file_lock(lock)
+            tmp_file = session_file.with_name(f"{session_file.name}.tmp")
+            with open(tmp_file, 'wb') as raw:
+                # Level 1 keeps frequent saves cheap while still shrinking the prose several-fold
+                with gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=1) as f:
+                    if SESSION_SNAPSHOT_PICKLE:
+                        pickle.dump(session_data, f, protocol=5)
+                    else:
+                        f.write(orjson.dumps(session_data))
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp_file, session_file)
+            
+            # The snapshot now holds every answer, so the log can start over
+            st.session_state.answers_file.write_bytes(b"")
+        
+        # Memory now matches disk, so the next rerun need not read it back
+        st.session_state._session_loaded = True
+        st.session_state._last_saved_hash = fingerprint
+        st.session_state._dirty_count = 0
+        st.session_state._last_snapshot = time.monotonic()
         return True
     except Exception as e:
         st.error(f"Error saving session: {str(e)}")
         return False
 
+def append_answers(answers):
+    """Record changed answers in the session's answer log in one write, snapshotting occasionally"""
+    user_answers = st.session_state.user_answers
+    changed = {key: value for key, value in answers.items() if user_answers.get(key) != value}
+    if not changed:
+        return
+    
+    user_answers.update(changed)
+    get_session_id()
+    
+    try:
+        now = time.time()
+        with open(st.session_state.answers_file, 'ab') as f:
+            f.write(b"".join(
+                orjson.dumps({"key": key, "value": value, "ts": now}) + b"\n"
+                for key, value in changed.items()
+            ))
+    except Exception as e:
+        st.error(f"Error saving answers: {str(e)}")
+    
+    st.session_state._dirty_count = st.session_state.get('_dirty_count', 0) + len(changed)
+    since_snapshot = time.monotonic() - st.session_state.get('_last_snapshot', 0.0)
+    if st.session_state._dirty_count >= SNAPSHOT_EVERY_N_ANSWERS or since_snapshot >= SNAPSHOT_DEBOUNCE_SECONDS:
+        save_session_data()
+
+def replay_answers(answers_file):
+    """Apply answer changes logged since the last full snapshot"""
+    if not answers_file.exists():
+        return
+    
+    user_answers = st.session_state.setdefault('user_answers', {})
+    for line in answers_file.read_bytes().splitlines():
+        try:
+            entry = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue  # a torn final line from an interrupted write
+        user_answers[entry["key"]] = entry["value"]
+
 def load_session_data():
     """Load session data from file"""
+    # Once restored or saved, session_state is authoritative; skip the disk
+    # read (and gzip/JSON parse) that every rerun would otherwise repeat
+    if st.session_state.get('_session_loaded'):
+        return True
+    
     session_id = get_session_id()
-    session_file = f"{STORAGE_DIR}/{session_id}.json"
+    storage = Path(STORAGE_DIR)
+    # Newest format first; older JSON snapshots still load
+    candidates = [(storage / f"{session_id}.json.gz", orjson.loads)]
+    if SESSION_SNAPSHOT_PICKLE:
+        candidates.insert(0, (storage / f"{session_id}.pkl.gz", pickle.loads))
+    legacy_file = storage / f"{session_id}.json"
+    existing = [(path, load) for path, load in candidates if path.exists()]
     
-    if os.path.exists(session_file):
+    if existing or legacy_file.exists():
         try:
-            with open(session_file, 'r') as f:
-                session_data = json.load(f)
+            if existing:
+                path, load = existing[0]
+                session_data = load(gzip.decompress(path.read_bytes()))
+            else:
+                session_data = orjson.loads(legacy_file.read_bytes())
             
             # Restore session state
             for key, value in session_data.items():
-                if key == 'start_time' and value:
+                if key == 'start_time' and isinstance(value, str):
+                    # JSON snapshots store the start time as ISO 8601 text
                     st.session_state[key] = datetime.fromisoformat(value)
+                elif key in ('processed_content_ref', 'processed_content'):
+                    # The corpus itself lives in the shared cache; sessions only keep a flag
+                    st.session_state.processed_content_loaded = bool(value) and load_corpus() is not None
                 elif key != 'last_saved' and value is not None:
                     st.session_state[key] = value
             
+            replay_answers(st.session_state.answers_file)
+            st.session_state._session_loaded = True
             return True
         except Exception as e:
             st.error(f"Error loading session: {str(e)}")
@@ -94,7 +277,7 @@ def initialize_session_state():
     if not load_session_data():
         # Initialize new session
         defaults = {
-            'processed_content': None,
+            'processed_content_loaded': False,
             'current_exam': None,
             'exam_started': False,
             'start_time': None,
@@ -107,14 +290,50 @@ def initialize_session_state():
             if key not in st.session_state:
                 st.session_state[key] = value
 
+@st.cache_data(ttl=60)
 def get_pdf_files():
-    """Get list of PDF files in financial books directory"""
-    pdf_files = []
-    if os.path.exists(FINANCIAL_BOOKS_DIR):
-        for file in os.listdir(FINANCIAL_BOOKS_DIR):
-            if file.lower().endswith('.pdf'):
-                pdf_files.append(os.path.join(FINANCIAL_BOOKS_DIR, file))
-    return pdf_files
+    """Get (path, size in bytes) for each PDF in the financial books directory"""
+    if not os.path.exists(FINANCIAL_BOOKS_DIR):
+        return []
+    # scandir entries carry their stat info, so sizes cost no extra syscalls
+    with os.scandir(FINANCIAL_BOOKS_DIR) as entries:
+        return [
+            (entry.path, entry.stat().st_size)
+            for entry in entries
+            if entry.name.lower().endswith('.pdf')
+        ]
+
+def write_corpus(results, f):
+    """Serialize the corpus to f piece by piece, returning its content hash"""
+    # Large lists (and dicts of lists) are encoded one element at a time so
+    # the whole corpus never exists a second time as a single JSON buffer
+    digest = hashlib.blake2b(digest_size=16)
+    
+    def emit(data):
+        digest.update(data)
+        f.write(data)
+    
+    def emit_list(items):
+        emit(b"[")
+        for i, item in enumerate(items):
+            emit(b"," + orjson.dumps(item) if i else orjson.dumps(item))
+        emit(b"]")
+    
+    emit(b"{")
+    for i, (key, value) in enumerate(results.items()):
+        emit((b"," if i else b"") + orjson.dumps(key) + b":")
+        if isinstance(value, list):
+            emit_list(value)
+        elif isinstance(value, dict) and value and all(isinstance(v, list) for v in value.values()):
+            emit(b"{")
+            for j, (sub_key, items) in enumerate(value.items()):
+                emit((b"," if j else b"") + orjson.dumps(sub_key) + b":")
+                emit_list(items)
+            emit(b"}")
+        else:
+            emit(orjson.dumps(value))
+    emit(b"}")
+    return digest.hexdigest()
 
 def process_financial_books():
     """Process PDFs from financial books folder or load pre-processed content"""
@@ -134,14 +353,11 @@ def process_financial_books():
         
         if file_exists:
             try:
-                preprocessed_content = load_preprocessed_content()
+                preprocessed_content = load_corpus()
                 
                 if preprocessed_content:
                     st.success("📦 Found pre-processed CFA content from your books!")
                     
-                    # Ensure proper format for question generation
-                    preprocessed_content = ensure_chunks_by_topic(preprocessed_content)
-                    
                     # Show content summary
                     summary = get_content_summary(preprocessed_content)
                     st.success(f"📚 Loaded {summary.get('total_files', 0)} books with {summary.get('total_chunks', 0)} chunks")
@@ -156,7 +372,7 @@ def process_financial_books():
             st.warning("⚠️ Compressed content file not found in cloud deployment")
     
     # If no pre-processed content, try local PDF processing
-    pdf_files = get_pdf_files()
+    pdf_files = [path for path, _ in get_pdf_files()]
     
     if not pdf_files:
         st.error(f"❌ No PDF files found in '{FINANCIAL_BOOKS_DIR}' folder!")
@@ -167,16 +383,24 @@ def process_financial_books():
     processed_file = f"{PROCESSED_DIR}/financial_books_content.json"
     if os.path.exists(processed_file):
         try:
-            with open(processed_file, 'r') as f:
-                existing_content = json.load(f)
+            # Parse exactly the file being checked; load_corpus() may prefer the .gz
+            processed_mtime = os.path.getmtime(processed_file)
+            
+            # The small manifest answers the membership question; the corpus
+            # itself is only parsed once we know it is usable
+            if os.path.exists(PROCESSED_MANIFEST_FILE):
+                with open(PROCESSED_MANIFEST_FILE, 'rb') as f:
+                    manifest = orjson.loads(f.read())
+            else:
+                manifest = get_processed_content(processed_file, processed_mtime)
             
             # Check if all current PDFs are included
-            existing_files = set(existing_content.get('processed_files', []))
+            existing_files = set(manifest.get('processed_files', []))
             current_files = set([os.path.basename(f) for f in pdf_files])
             
             if current_files.issubset(existing_files):
                 st.info("📚 Using previously processed content from your financial books")
-                return ensure_chunks_by_topic(existing_content)
+                return get_processed_content(processed_file, processed_mtime)
         except:
             pass
     
@@ -190,9 +414,22 @@ def process_financial_books():
                 # Use ingest_pdfs to get proper chunks_by_topic format
                 results = ingest_pdfs(pdf_files, output_format="chunked_text_by_topic")
             
-            # Save processed content
-            with open(processed_file, 'w') as f:
-                json.dump(results, f, indent=2)
+            # Save processed content (compact, streamed to disk); corpus first,
+            # then manifest, each swapped in whole so neither is ever truncated
+            tmp_file = f"{processed_file}.tmp"
+            with open(tmp_file, 'wb') as f:
+                content_hash = write_corpus(results, f)
+            os.replace(tmp_file, processed_file)
+            
+            manifest = {
+                "processed_files": results.get('processed_files', []),
+                "schema_version": MANIFEST_SCHEMA_VERSION,
+                "content_hash": content_hash
+            }
+            tmp_file = f"{PROCESSED_MANIFEST_FILE}.tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(manifest))
+            os.replace(tmp_file, PROCESSED_MANIFEST_FILE)
             
             st.success(f"✅ Successfully processed {len(results['processed_files'])} books!")
             st.success(f"📊 Found {len(results.get('chunks_by_topic', {}))} topics with content")
@@ -215,14 +452,14 @@ def display_content_status():
     
     if pdf_files:
         with st.sidebar.expander("📖 Your CFA Books"):
-            for pdf_file in pdf_files:
+            for pdf_file, size_bytes in pdf_files:
                 filename = os.path.basename(pdf_file)
-                file_size = os.path.getsize(pdf_file) / (1024 * 1024)  # MB
+                file_size = size_bytes / (1024 * 1024)  # MB
                 st.write(f"• {filename} ({file_size:.1f} MB)")
     
-    if st.session_state.processed_content:
+    content = load_corpus() if st.session_state.processed_content_loaded else None
+    if content:
         st.sidebar.success("✅ Content Processed")
-        content = st.session_state.processed_content
         st.sidebar.write(f"Total chunks: {len(content.get('all_chunks', []))}")
         st.sidebar.write(f"Topics: {len(content.get('topic_distribution', {}))}")
     else:
@@ -239,12 +476,102 @@ def display_session_status():
     # Show persistence status
     if st.session_state.exam_started and not st.session_state.exam_submitted:
         st.sidebar.info("🔄 Exam in progress")
-        st.sidebar.write("✅ Auto-saving answers")
+        st.sidebar.write(f"✅ Answers auto-saved every {DRAFT_SAVE_SECONDS}s")
         st.sidebar.write("✅ Timer persistent")
         st.sidebar.write("🔄 Safe to refresh!")
     else:
         st.sidebar.write("💾 Progress auto-saved")
 
+def build_timer_html(start_time_js, total_time_ms, draft_save_ms):
+    """Timer widget markup for an exam start time and duration, with periodic draft saves"""
+    timer_html = f"""
+    <div style="text-align: center; padding: 20px; background: #f0f2f6; border-radius: 10px; margin: 20px 0;">
+        <h2 id="timer-display" style="font-size: 2.5em; margin: 0; font-family: monospace;">⏰ Loading...</h2>
+        <div id="progress-container" style="width: 100%; background: #ddd; border-radius: 10px; margin-top: 15px;">
+            <div id="progress-bar" style="height: 20px; background: linear-gradient(90deg, #4CAF50, #FFC107, #FF5722); border-radius: 10px; width: 0%; transition: width 1s;"></div>
+        </div>
+        <p style="margin: 10px 0 0 0; color: #666;">💾 Answers are saved automatically and survive a refresh</p>
+    </div>
+    
+    <script>
+    // Submitting the exam form is the only way its answers reach the server
+    function saveDraft() {{
+        try {{
+            for (const button of window.parent.document.querySelectorAll('button')) {{
+                if (button.innerText.includes('Save Answers')) {{
+                    button.click();
+                    return;
+                }}
+            }}
+        }} catch (e) {{}}
+    }}
+    
+    let finalSaveDone = false;
+    
+    function updateTimer() {{
+        const startTime = {start_time_js};
+        const totalTime = {total_time_ms};
+        const now = Date.now();
+        const elapsed = now - startTime;
+        const remaining = Math.max(0, totalTime - elapsed);
+        
+        if (remaining <= 0) {{
+            document.getElementById('timer-display').innerHTML = '🔴 TIME UP!';
+            document.getElementById('progress-bar').style.width = '100%';
+            if (!finalSaveDone) {{
+                finalSaveDone = true;
+                saveDraft();
+            }}
+            return;
+        }}
+        
+        const totalSeconds = Math.floor(remaining / 1000);
+        const hours = Math.floor(totalSeconds / 3600);
+        const minutes = Math.floor((totalSeconds % 3600) / 60);
+        const seconds = totalSeconds % 60;
+        
+        let timeStr;
+        let icon;
+        if (hours > 0) {{
+            timeStr = String(hours).padStart(2, '0') + ':' + 
+                     String(minutes).padStart(2, '0') + ':' + 
+                     String(seconds).padStart(2, '0');
+        }} else {{
+            timeStr = String(minutes).padStart(2, '0') + ':' + 
+                     String(seconds).padStart(2, '0');
+        }}
+        
+        if (totalSeconds < 300) {{
+            icon = '🔴';
+        }} else if (totalSeconds < 900) {{
+            icon = '🟡';
+        }} else {{
+            icon = '⏰';
+        }}
+        
+        document.getElementById('timer-display').innerHTML = icon + ' Time Remaining: ' + timeStr;
+        
+        const progress = (elapsed / totalTime) * 100;
+        document.getElementById('progress-bar').style.width = Math.min(progress, 100) + '%';
+    }}
+    
+    // Update immediately and then every second
+    updateTimer();
+    setInterval(updateTimer, 1000);
+    setInterval(saveDraft, {draft_save_ms});
+    </script>
+    """
+    # Indentation and blank lines are dead weight in the srcdoc sent on each rerun
+    return "\n".join(line.strip() for line in timer_html.splitlines() if line.strip())
+
+def committed_form_answers():
+    """Exam answers as last committed by the form, keyed like user_answers"""
+    return {
+        key.split("_", 1)[1]: value
+        for key, value in st.session_state.items()
+        if isinstance(key, str) and key.startswith(("input_", "radio_"))
+    }
+
 def display_exam_interface():
     """Display exam interface with live timer and answers"""
     exam = st.session_state.current_exam
@@ -256,102 +583,58 @@ def display_exam_interface():
         remaining = timedelta(minutes=exam["total_time_minutes"]) - elapsed
         
         if remaining.total_seconds() <= 0:
+            # A Save/Submit click (or the timer's final draft save) that lands
+            # after time is up still carries answers the form has not recorded
+            append_answers(committed_form_answers())
             st.error("⏰ Time's up! Exam automatically submitted.")
             st.session_state.exam_submitted = True
             save_session_data()
             st.rerun()
         
-        # Calculate time components
-        total_seconds = int(remaining.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        seconds = total_seconds % 60
-        
-        # JavaScript-based live timer
+        # JavaScript-based live timer; the start and duration are fixed for the
+        # exam, so the markup is identical each rerun and the iframe is not remounted
         start_time_js = int(st.session_state.start_time.timestamp() * 1000)
         total_time_ms = exam["total_time_minutes"] * 60 * 1000
         
-        timer_html = f"""
-        <div style="text-align: center; padding: 20px; background: #f0f2f6; border-radius: 10px; margin: 20px 0;">
-            <h2 id="timer-display" style="font-size: 2.5em; margin: 0; font-family: monospace;">⏰ Loading...</h2>
-            <div id="progress-container" style="width: 100%; background: #ddd; border-radius: 10px; margin-top: 15px;">
-                <div id="progress-bar" style="height: 20px; background: linear-gradient(90deg, #4CAF50, #FFC107, #FF5722); border-radius: 10px; width: 0%; transition: width 1s;"></div>
-            </div>
-            <p style="margin: 10px 0 0 0; color: #666;">💾 Your answers are being saved automatically - safe to refresh!</p>
-        </div>
-        
-        <script>
-        function updateTimer() {{
-            const startTime = {start_time_js};
-            const totalTime = {total_time_ms};
-            const now = Date.now();
-            const elapsed = now - startTime;
-            const remaining = Math.max(0, totalTime - elapsed);
-            
-            if (remaining <= 0) {{
-                document.getElementById('timer-display').innerHTML = '🔴 TIME UP!';
-                document.getElementById('progress-bar').style.width = '100%';
-                return;
-            }}
-            
-            const totalSeconds = Math.floor(remaining / 1000);
-            const hours = Math.floor(totalSeconds / 3600);
-            const minutes = Math.floor((totalSeconds % 3600) / 60);
-            const seconds = totalSeconds % 60;
-            
-            let timeStr;
-            let icon;
-            if (hours > 0) {{
-                timeStr = String(hours).padStart(2, '0') + ':' + 
-                         String(minutes).padStart(2, '0') + ':' + 
-                         String(seconds).padStart(2, '0');
-            }} else {{
-                timeStr = String(minutes).padStart(2, '0') + ':' + 
-                         String(seconds).padStart(2, '0');
-            }}
-            
-            if (totalSeconds < 300) {{
-                icon = '🔴';
-            }} else if (totalSeconds < 900) {{
-                icon = '🟡';
-            }} else {{
-                icon = '⏰';
-            }}
-            
-            document.getElementById('timer-display').innerHTML = icon + ' Time Remaining: ' + timeStr;
-            
-            const progress = (elapsed / totalTime) * 100;
-            document.getElementById('progress-bar').style.width = Math.min(progress, 100) + '%';
-        }}
-        
-        // Update immediately and then every second
-        updateTimer();
-        setInterval(updateTimer, 1000);
-        </script>
-        """
-        
-        st.components.v1.html(timer_html, height=150)
+        st.components.v1.html(
+            build_timer_html(start_time_js, total_time_ms, DRAFT_SAVE_SECONDS * 1000),
+            height=150
+        )
     
     st.markdown("---")
     
-    if session == "AM":
-        display_am_exam()
-    else:
-        display_pm_exam()
+    # Answers are edited inside a form, so typing or clicking an option does
+    # not rerun the whole exam page; they are recorded together on save/submit
+    # and on the timer's periodic draft save
+    with st.form("exam_form", clear_on_submit=False):
+        if session == "AM":
+            answers = display_am_exam()
+        else:
+            answers = display_pm_exam()
+        
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            save_clicked = st.form_submit_button("💾 Save Answers")
+        with col2:
+            submit_clicked = st.form_submit_button("📤 Submit Exam", type="primary")
     
-    # Submit button
-    col1, col2, col3 = st.columns([1, 1, 1])
-    with col2:
-        if st.button("📤 Submit Exam", type="primary"):
-            st.session_state.exam_submitted = True
-            save_session_data()
-            st.success("✅ Exam submitted!")
-            st.balloons()
-            st.rerun()
+    if save_clicked or submit_clicked:
+        append_answers(answers)
+    
+    if save_clicked:
+        st.success("💾 Answers saved")
+    
+    if submit_clicked:
+        st.session_state.exam_submitted = True
+        save_session_data()
+        st.success("✅ Exam submitted!")
+        st.balloons()
+        st.rerun()
 
 def display_am_exam():
-    """Display AM questions with persistent answers"""
+    """Display AM questions with persistent answers, returning the entered answers"""
     exam = st.session_state.current_exam
+    answers = {}
     
     for question in exam["questions"]:
         st.subheader(f"Question {question['question_number']} - {question['topic']} ({question['total_points']} points)")
@@ -368,8 +651,8 @@ def display_am_exam():
             answer_key = f"q{question['question_number']}_{sub_q['part']}"
             current_answer = st.session_state.user_answers.get(answer_key, "")
             
-            # Text area with persistent value and auto-save
-            answer = st.text_area(
+            # Text area with persistent value
+            answers[answer_key] = st.text_area(
                 f"Your answer for {sub_q['part']}:",
                 value=current_answer,
                 key=f"input_{answer_key}",
@@ -377,16 +660,14 @@ def display_am_exam():
                 placeholder="Provide your detailed answer here..."
             )
             
-            # Save answer and auto-save session
-            if answer != current_answer:
-                st.session_state.user_answers[answer_key] = answer
-                save_session_data()
-            
             st.markdown("---")
+    
+    return answers
 
 def display_pm_exam():
-    """Display PM questions with persistent answers"""
+    """Display PM questions with persistent answers, returning the selected options"""
     exam = st.session_state.current_exam
+    answers = {}
     
     for item_set in exam["questions"]:
         st.subheader(f"Item Set {item_set['set_number']} - {item_set['topic']}")
@@ -409,7 +690,7 @@ def display_pm_exam():
                 default_index = options.index(current_answer)
             
             # Radio button with persistent selection
-            selected = st.radio(
+            answers[answer_key] = st.radio(
                 f"Select answer for question {mcq['question_number']}:",
                 options=options,
                 index=default_index,
@@ -417,56 +698,27 @@ def display_pm_exam():
                 format_func=lambda x: f"{x}. {mcq['options'][x]}"
             )
             
-            # Save answer and auto-save session
-            if selected != current_answer:
-                st.session_state.user_answers[answer_key] = selected
-                save_session_data()
-            
         st.markdown("---")
+    
+    return answers
 
 # Real AI-powered question generation using OpenAI
 import openai
 from dotenv import load_dotenv
+from src.llm_client import make_async_client
+from src.question_cache import question_cache_key, read_cached_response, write_cached_response
 
 # Load environment variables
 load_dotenv()
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
-def generate_questions_from_content(session_type, content):
-    """Generate real CFA questions using OpenAI from processed content"""
-    if not content or 'chunks_by_topic' not in content:
-        st.error("No processed content available for question generation!")
-        return []
-    
-    chunks_by_topic = content['chunks_by_topic']
-    if not chunks_by_topic:
-        st.error("No topic-classified content found!")
-        return []
-    
-    questions = []
-    
-    try:
-        if session_type == "AM":
-            # Generate 4 AM constructed response questions
-            available_topics = list(chunks_by_topic.keys())
-            selected_topics = random.sample(available_topics, min(4, len(available_topics)))
-            
-            for i, topic in enumerate(selected_topics, 1):
-                chunks = chunks_by_topic[topic]
-                if not chunks:
-                    continue
-                    
-                # Select relevant content chunks for this topic
-                selected_chunks = random.sample(chunks, min(3, len(chunks)))
-                content_text = "\n\n".join([chunk['content'] for chunk in selected_chunks])
-                
-                # Generate AM question using OpenAI
-                prompt = f"""
+# Prompt templates, filled with str.format (hence the doubled JSON braces)
+AM_PROMPT_TEMPLATE = """
 You are creating a CFA Level III Morning Session constructed response question.
 
 Topic: {topic}
 Content from CFA books:
-{content_text[:2000]}
+{content}
 
 Create a realistic CFA Level III AM question with:
 1. A detailed scenario (200-300 words)
@@ -482,62 +734,13 @@ Return ONLY a JSON object with this structure:
         {{"part": "B", "question": "question text", "points": 10}}
     ]
 }}"""
-                
-                response = openai.chat.completions.create(
-                    model=os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview'),
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7,
-                    max_tokens=1000
-                )
-                
-                try:
-                    import json
-                    # Clean the response - remove markdown code blocks if present
-                    raw_response = response.choices[0].message.content.strip()
-                    if raw_response.startswith('```json'):
-                        raw_response = raw_response[7:]  # Remove ```json
-                    if raw_response.endswith('```'):
-                        raw_response = raw_response[:-3]  # Remove ```
-                    raw_response = raw_response.strip()
-                    
-                    question_data = json.loads(raw_response)
-                    
-                    question = {
-                        "question_id": f"AM_Q{i}_{topic.replace(' ', '_')}",
-                        "question_number": i,
-                        "topic": topic,
-                        "scenario": question_data["scenario"],
-                        "sub_questions": question_data["sub_questions"],
-                        "total_points": 20,
-                        "estimated_time_minutes": 45
-                    }
-                    questions.append(question)
-                    
-                except (json.JSONDecodeError, KeyError) as e:
-                    st.warning(f"Error parsing question {i} for {topic}: {e}")
-                    continue
-        
-        else:  # PM Session
-            # Generate 5 PM item sets
-            available_topics = list(chunks_by_topic.keys())
-            selected_topics = random.sample(available_topics, min(5, len(available_topics)))
-            
-            for i, topic in enumerate(selected_topics, 1):
-                chunks = chunks_by_topic[topic]
-                if not chunks:
-                    continue
-                    
-                # Select relevant content chunks for this topic
-                selected_chunks = random.sample(chunks, min(3, len(chunks)))
-                content_text = "\n\n".join([chunk['content'] for chunk in selected_chunks])
-                
-                # Generate PM item set using OpenAI
-                prompt = f"""
+
+PM_PROMPT_TEMPLATE = """
 You are creating a CFA Level III Afternoon Session item set.
 
 Topic: {topic}
 Content from CFA books:
-{content_text[:2000]}
+{content}
 
 Create a realistic CFA Level III PM item set with:
 1. A case study vignette (150-200 words)
@@ -569,60 +772,158 @@ Return ONLY a JSON object with this structure:
         }}
     ]
 }}"""
-                
-                response = openai.chat.completions.create(
-                    model=os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview'),
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7,
-                    max_tokens=1500
-                )
-                
-                try:
-                    import json
-                    # Clean the response - remove markdown code blocks if present
-                    raw_response = response.choices[0].message.content.strip()
-                    if raw_response.startswith('```json'):
-                        raw_response = raw_response[7:]  # Remove ```json
-                    if raw_response.endswith('```'):
-                        raw_response = raw_response[:-3]  # Remove ```
-                    raw_response = raw_response.strip()
-                    
-                    item_data = json.loads(raw_response)
-                    
-                    # Add question numbers
-                    for j, q in enumerate(item_data["questions"]):
-                        q["question_number"] = (i-1) * 3 + j + 1
-                        q["points"] = 6
-                    
-                    item_set = {
-                        "item_set_id": f"PM_Set{i}_{topic.replace(' ', '_')}",
-                        "set_number": i,
-                        "topic": topic,
-                        "vignette": item_data["vignette"],
-                        "questions": item_data["questions"],
-                        "total_points": 18,
-                        "estimated_time_minutes": 36
-                    }
-                    questions.append(item_set)
-                    
-                except (json.JSONDecodeError, KeyError) as e:
-                    st.warning(f"Error parsing item set {i} for {topic}: {e}")
-                    continue
+
+PROMPT_CONTENT_CHARS = 2000
+
+def source_excerpt(chunks, limit=PROMPT_CONTENT_CHARS):
+    """Join chunk texts with blank lines, stopping once limit characters are collected"""
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if parts:
+            parts.append("\n\n")
+            size += 2
+        parts.append(chunk['content'])
+        size += len(chunk['content'])
+        if size >= limit:
+            break
+    return "".join(parts)[:limit]
+
+async def generate_one_question(client, session_type, i, topic, chunks):
+    """Generate one AM question or PM item set for a topic; raises on a malformed response"""
+    # Select relevant content chunks for this topic, sampling indices so large
+    # topics are never copied
+    picks = random.sample(range(len(chunks)), min(3, len(chunks)))
+    content_text = source_excerpt([chunks[j] for j in picks])
+    
+    if session_type == "AM":
+        prompt = AM_PROMPT_TEMPLATE.format(topic=topic, content=content_text)
+        max_tokens = 1000
+    else:
+        prompt = PM_PROMPT_TEMPLATE.format(topic=topic, content=content_text)
+        max_tokens = 1500
+    
+    model = os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
+    key = question_cache_key(session_type, model, prompt)
+    try:
+        raw_response = read_cached_response(key)
+        cached = True
+    except FileNotFoundError:
+        # JSON mode means no markdown fences to strip; streaming lets the
+        # connection deliver tokens as they are generated
+        stream = await client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+            stream=True
+        )
+        
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+        raw_response = "".join(parts).strip()
+        cached = False
+    
+    if session_type == "AM":
+        question_data = orjson.loads(raw_response)
         
-        return questions
+        question = {
+            "question_id": f"AM_Q{i}_{topic.replace(' ', '_')}",
+            "question_number": i,
+            "topic": topic,
+            "scenario": question_data["scenario"],
+            "sub_questions": question_data["sub_questions"],
+            "total_points": 20,
+            "estimated_time_minutes": 45
+        }
+    else:
+        item_data = orjson.loads(raw_response)
+        
+        # Add question numbers
+        for j, q in enumerate(item_data["questions"]):
+            q["question_number"] = (i-1) * 3 + j + 1
+            q["points"] = 6
         
+        question = {
+            "item_set_id": f"PM_Set{i}_{topic.replace(' ', '_')}",
+            "set_number": i,
+            "topic": topic,
+            "vignette": item_data["vignette"],
+            "questions": item_data["questions"],
+            "total_points": 18,
+            "estimated_time_minutes": 36
+        }
+    
+    # Only responses that produced a complete question are worth reusing
+    if not cached:
+        write_cached_response(key, raw_response)
+    return question
+
+async def generate_all_questions(session_type, chunks_by_topic, numbered_topics, on_ready=None):
+    """Issue every topic's OpenAI request concurrently; failures come back as exceptions"""
+    # One client (and connection pool) for the whole batch
+    async with make_async_client() as client:
+        async def generate_and_report(i, topic):
+            question = await generate_one_question(client, session_type, i, topic, chunks_by_topic[topic])
+            if on_ready:
+                on_ready(i, topic)
+            return question
+        
+        tasks = [generate_and_report(i, topic) for i, topic in numbered_topics]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+def generate_questions_from_content(session_type, content):
+    """Generate real CFA questions using OpenAI from processed content"""
+    if not content or 'chunks_by_topic' not in content:
+        st.error("No processed content available for question generation!")
+        return []
+    
+    chunks_by_topic = content['chunks_by_topic']
+    if not chunks_by_topic:
+        st.error("No topic-classified content found!")
+        return []
+    
+    # 4 AM constructed response questions or 5 PM item sets
+    available_topics = content.get('topic_keys') or tuple(chunks_by_topic)
+    num_topics = 4 if session_type == "AM" else 5
+    selected_topics = random.sample(available_topics, min(num_topics, len(available_topics)))
+    numbered_topics = [(i, topic) for i, topic in enumerate(selected_topics, 1) if chunks_by_topic[topic]]
+    label = "question" if session_type == "AM" else "item set"
+    
+    try:
+        # Report each question as it lands rather than after the slowest one
+        results = asyncio.run(generate_all_questions(
+            session_type, chunks_by_topic, numbered_topics,
+            on_ready=lambda i, topic: st.write(f"✅ {label.capitalize()} {i} ready ({topic})")
+        ))
     except Exception as e:
         st.error(f"Error generating questions: {str(e)}")
         return []
+    
+    questions = []
+    for (i, topic), result in zip(numbered_topics, results):
+        if isinstance(result, (orjson.JSONDecodeError, KeyError)):
+            st.warning(f"Error parsing {label} {i} for {topic}: {result}")
+        elif isinstance(result, Exception):
+            st.error(f"Error generating questions: {str(result)}")
+            return []
+        else:
+            questions.append(result)
+    
+    return questions
 
 def build_exam_from_books(session_type):
     """Build exam from processed financial books"""
-    if not st.session_state.processed_content:
+    content = load_corpus() if st.session_state.processed_content_loaded else None
+    if not content:
         st.error("No processed content available!")
         return None
     
     with st.spinner(f"Building {session_type} exam from your CFA books..."):
-        questions = generate_questions_from_content(session_type, st.session_state.processed_content)
+        questions = generate_questions_from_content(session_type, content)
         
         exam = {
             "exam_id": f"CFA_L3_{session_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
@@ -637,7 +938,7 @@ def build_exam_from_books(session_type):
                 "Based on content from your financial books",
                 "Time: 180 minutes (3 hours)",
                 "Read all instructions carefully",
-                "Your progress is automatically saved"
+                "Save your answers as you go; saved progress survives a refresh"
             ]
         }
         
@@ -691,7 +992,7 @@ def main():
     display_session_status()
     
     # Main workflow
-    if not st.session_state.processed_content:
+    if not st.session_state.processed_content_loaded:
         st.subheader("📚 Step 1: Process Your CFA Books")
         st.info("The system will automatically process PDFs from your 'financial books' folder")
         
@@ -702,7 +1003,7 @@ def main():
             if st.button("🔄 Process My CFA Books", type="primary"):
                 content = process_financial_books()
                 if content:
-                    st.session_state.processed_content = content
+                    st.session_state.processed_content_loaded = True
                     save_session_data()
                     st.success("✅ Your books have been processed!")
                     st.rerun()
@@ -714,7 +1015,7 @@ def main():
         st.subheader("📝 Step 2: Build Exam from Your Books")
         
         # Show content summary
-        content = st.session_state.processed_content
+        content = load_corpus() or {}
         col1, col2, col3 = st.columns(3)
         with col1:
             st.metric("Books Processed", len(content.get('processed_files', [])))
@@ -0,0 +1,29 @@
+"""
+Regenerate data/sample_cfa_content.py from data/sample_cfa_content.json
+
+The app imports the generated module so the sample content is loaded from
+cached bytecode instead of being parsed as JSON on every cold start.
+Run from the repository root after editing the JSON file:
+
+    python scripts/build_sample_content.py
+"""
+import json
+import pprint
+
+SOURCE_PATH = "data/sample_cfa_content.json"
+TARGET_PATH = "data/sample_cfa_content.py"
+
+def build_sample_content():
+    with open(SOURCE_PATH, 'r', encoding='utf-8') as f:
+        content = json.load(f)
+
+    with open(TARGET_PATH, 'w', encoding='utf-8') as f:
+        f.write('"""\nGenerated by scripts/build_sample_content.py from sample_cfa_content.json - do not edit\n"""\n')
+        f.write("CONTENT = ")
+        f.write(pprint.pformat(content, width=120, sort_dicts=False))
+        f.write("\n")
+
+    print(f"Wrote {TARGET_PATH}")
+
+if __name__ == "__main__":
+    build_sample_content()
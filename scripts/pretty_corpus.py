@@ -0,0 +1,41 @@
+"""
+Pretty-print the processed corpus for manual inspection
+
+The app writes data/processed/financial_books_content.json (or .json.gz)
+compactly since only the app reads it. Run from the repository root:
+
+    python scripts/pretty_corpus.py [output_path]
+
+Without an output path the indented JSON is written to stdout.
+"""
+import gzip
+import json
+import os
+import sys
+
+SOURCE_PATHS = (
+    "data/processed/financial_books_content.json.gz",
+    "data/processed/financial_books_content.json"
+)
+
+def pretty_corpus(output_path=None):
+    source = next((path for path in SOURCE_PATHS if os.path.exists(path)), None)
+    if source is None:
+        print("No processed corpus found", file=sys.stderr)
+        return 1
+
+    opener = gzip.open if source.endswith(".gz") else open
+    with opener(source, 'rt', encoding='utf-8') as f:
+        content = json.load(f)
+
+    pretty = json.dumps(content, indent=2, ensure_ascii=False)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(pretty + "\n")
+        print(f"Wrote {output_path}", file=sys.stderr)
+    else:
+        print(pretty)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(pretty_corpus(sys.argv[1] if len(sys.argv) > 1 else None))
@@ -1,34 +1,82 @@
 """
 Content loader utility for handling compressed pre-processed CFA content
 """
-import json
 import gzip
+import mmap
 import os
+import shutil
 from typing import Dict, Optional
 
+import orjson
+import streamlit as st
+
+COMPRESSED_CONTENT_FILE = "data/processed/financial_books_content.json.gz"
+UNCOMPRESSED_CONTENT_FILE = "data/processed/financial_books_content.json"
+# Decompressed copy of COMPRESSED_CONTENT_FILE; named apart from the plain
+# .json that local PDF processing writes so neither can shadow the other
+CONTENT_SIDECAR_FILE = "data/processed/financial_books_content.unpacked.json"
+
+def prepare_content() -> bool:
+    """
+    Decompress the shipped .json.gz once into a plain .json sidecar so later
+    loads can map the file instead of inflating it. Returns True when an
+    up-to-date sidecar is available.
+    """
+    if not os.path.exists(COMPRESSED_CONTENT_FILE):
+        return False
+    
+    gz_mtime = os.path.getmtime(COMPRESSED_CONTENT_FILE)
+    if os.path.exists(CONTENT_SIDECAR_FILE) and os.path.getmtime(CONTENT_SIDECAR_FILE) >= gz_mtime:
+        return True
+    
+    try:
+        tmp_file = f"{CONTENT_SIDECAR_FILE}.tmp"
+        with gzip.open(COMPRESSED_CONTENT_FILE, 'rb') as src, open(tmp_file, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        # Carry the archive's mtime over so the sidecar reads as the same version
+        os.utime(tmp_file, (gz_mtime, gz_mtime))
+        os.replace(tmp_file, CONTENT_SIDECAR_FILE)
+        return True
+    except OSError as e:
+        print(f"⚠️ Could not write uncompressed content sidecar: {e}")
+        return False
+
+def load_mapped_json(path: str) -> Dict:
+    """Parse a JSON file straight from a read-only memory map"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return {}
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+
 def load_preprocessed_content() -> Optional[Dict]:
     """
-    Load pre-processed CFA content from compressed file
-    Falls back to uncompressed if needed
+    Load pre-processed CFA content, preferring an up-to-date sidecar of the
+    compressed file, then the compressed file, then the uncompressed file
     """
-    # Try compressed file first (for cloud deployment)
-    compressed_file = "data/processed/financial_books_content.json.gz"
-    uncompressed_file = "data/processed/financial_books_content.json"
+    compressed_file = COMPRESSED_CONTENT_FILE
+    uncompressed_file = UNCOMPRESSED_CONTENT_FILE
     
     try:
-        # Try compressed file
-        if os.path.exists(compressed_file):
+        if prepare_content():
+            print("📄 Loading decompressed pre-processed CFA content...")
+            content = load_mapped_json(CONTENT_SIDECAR_FILE)
+            print(f"✅ Loaded {len(content.get('all_chunks', []))} chunks from decompressed sidecar")
+            return content
+        
+        # Compressed file when no sidecar could be written (e.g. read-only disk)
+        elif os.path.exists(compressed_file):
             print("📦 Loading compressed pre-processed CFA content...")
-            with gzip.open(compressed_file, 'rt', encoding='utf-8') as f:
-                content = json.load(f)
+            with gzip.open(compressed_file, 'rb') as f:
+                content = orjson.loads(f.read())
             print(f"✅ Loaded {len(content.get('all_chunks', []))} chunks from compressed file")
             return content
-            
+        
         # Fall back to uncompressed file
         elif os.path.exists(uncompressed_file):
             print("📄 Loading uncompressed pre-processed CFA content...")
-            with open(uncompressed_file, 'r', encoding='utf-8') as f:
-                content = json.load(f)
+            content = load_mapped_json(uncompressed_file)
             print(f"✅ Loaded {len(content.get('all_chunks', []))} chunks from uncompressed file")
             return content
             
@@ -40,11 +88,7 @@ def load_preprocessed_content() -> Optional[Dict]:
         print(f"❌ Error loading pre-processed content: {e}")
         return None
 
-def get_content_summary(content: Dict) -> Dict:
-    """Get summary statistics of the loaded content"""
-    if not content:
-        return {}
-    
+def _build_summary(content: Dict) -> Dict:
     return {
         "total_files": len(content.get('processed_files', [])),
         "total_chunks": len(content.get('all_chunks', [])),
@@ -54,22 +98,48 @@ def get_content_summary(content: Dict) -> Dict:
         "total_tokens": content.get('total_tokens', 0)
     }
 
+def get_content_summary(content: Dict) -> Dict:
+    """Get summary statistics of the loaded content"""
+    if not content:
+        return {}
+    
+    # get_cfa_content precomputes it; never write into a (possibly shared) dict here
+    summary = content.get('_summary')
+    return summary if summary is not None else _build_summary(content)
+
 def ensure_chunks_by_topic(content: Dict) -> Dict:
     """Ensure content has chunks_by_topic structure for question generation"""
     if not content:
         return content
         
     if 'chunks_by_topic' not in content and 'all_chunks' in content:
-        print("🔧 Creating chunks_by_topic structure...")
-        chunks_by_topic = {}
-        
-        for chunk in content['all_chunks']:
-            topic = chunk.get('topic', 'General')
-            if topic not in chunks_by_topic:
-                chunks_by_topic[topic] = []
-            chunks_by_topic[topic].append(chunk)
+        from src.pdf_processor import group_chunks_by_topic
         
+        print("🔧 Creating chunks_by_topic structure...")
+        chunks_by_topic = group_chunks_by_topic(content['all_chunks'])
         content['chunks_by_topic'] = chunks_by_topic
         print(f"✅ Created chunks_by_topic with {len(chunks_by_topic)} topics")
     
     return content
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def get_cfa_content(version: Optional[float] = None) -> Optional[Dict]:
+    """
+    Decoded content with chunks_by_topic, shared by every rerun and session.
+    cache_resource does not copy it per caller, so treat the dict as read-only.
+    Pass the content file's mtime as version to pick up reprocessed content.
+    """
+    content = ensure_chunks_by_topic(load_preprocessed_content())
+    
+    # Topic list computed once per content version rather than on every exam build
+    if content and 'chunks_by_topic' in content:
+        content['topic_keys'] = tuple(content['chunks_by_topic'])
+    
+    # Likewise the summary, filled in before the dict is shared
+    if content:
+        content['_summary'] = _build_summary(content)
+    return content
+
+if __name__ == "__main__":
+    # Deploy-time step: python -m src.content_loader
+    prepare_content()
@@ -3,12 +3,22 @@ Enhanced Question Generator with Topic Diversity and Uniqueness
 Implements proper CFA Level III topic weighting and prevents duplicates
 """
 
+import asyncio
 import random
-import json
+import re
 import hashlib
-from typing import Dict, List, Tuple
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 import os
 
+import orjson
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
 # CFA Level III Topic Weights (based on official curriculum)
 CFA_TOPIC_WEIGHTS = {
     "Portfolio Management": 0.35,  # 30-35%
@@ -64,16 +74,44 @@ TOPIC_KEYWORDS = {
     ]
 }
 
+# Lowercased once at import instead of on every classification
+TOPIC_KEYWORDS_LOWER = {
+    topic: tuple(keyword.lower() for keyword in keywords)
+    for topic, keywords in TOPIC_KEYWORDS.items()
+}
+
+def _build_automaton():
+    """Aho-Corasick automaton over every keyword, payload = topics listing it"""
+    keyword_topics = {}
+    for topic, keywords in TOPIC_KEYWORDS_LOWER.items():
+        for keyword in keywords:
+            keyword_topics.setdefault(keyword, []).append(topic)
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, topics in keyword_topics.items():
+        automaton.add_word(keyword, tuple(topics))
+    automaton.make_automaton()
+    return automaton
+
+KEYWORD_AUTOMATON = _build_automaton() if AHOCORASICK_AVAILABLE else None
+
 def classify_content_topic(content: str) -> str:
     """Classify content into CFA topics based on keyword frequency"""
-    content_lower = content.lower()
-    topic_scores = {}
-    
-    for topic, keywords in TOPIC_KEYWORDS.items():
-        score = 0
-        for keyword in keywords:
-            score += content_lower.count(keyword.lower())
-        topic_scores[topic] = score
+    return classify_content_topic_lower(content.lower())
+
+def classify_content_topic_lower(content_lower: str) -> str:
+    """classify_content_topic for text that is already lowercased"""
+    if KEYWORD_AUTOMATON is not None:
+        # One linear pass reports every (overlapping) keyword occurrence
+        topic_scores = dict.fromkeys(TOPIC_KEYWORDS_LOWER, 0)
+        for _, topics in KEYWORD_AUTOMATON.iter(content_lower):
+            for topic in topics:
+                topic_scores[topic] += 1
+    else:
+        topic_scores = {
+            topic: sum(map(content_lower.count, keywords))
+            for topic, keywords in TOPIC_KEYWORDS_LOWER.items()
+        }
     
     # Return topic with highest score, or Portfolio Management as default
     if max(topic_scores.values()) == 0:
@@ -81,6 +119,39 @@ def classify_content_topic(content: str) -> str:
     
     return max(topic_scores, key=topic_scores.get)
 
+# The derived text and index are cached here, keyed on all_text itself, rather
+# than stored in the content dict that other sessions share read-only
+@lru_cache(maxsize=2)
+def lower_text(full_text: str) -> Optional[str]:
+    """all_text lowercased once, or None if lowering changes its length (offsets would not line up)"""
+    full_lower = full_text.lower()
+    return full_lower if len(full_lower) == len(full_text) else None
+
+def _sentence_bounds(full_text: str, start_pos: int, max_chars: int) -> Tuple[int, int]:
+    """Bounds of a chunk with the partial first and last sentences trimmed off"""
+    end_pos = min(start_pos + max_chars, len(full_text))
+    first_dot = full_text.find('.', start_pos, end_pos)
+    last_dot = full_text.rfind('.', start_pos, end_pos)
+    if first_dot != last_dot:
+        return first_dot + 1, last_dot + 1
+    return start_pos, end_pos
+
+def _classify_span(full_text: str, start_pos: int, end_pos: int) -> str:
+    """Classify full_text[start_pos:end_pos], slicing the pre-lowered text when available"""
+    full_lower = lower_text(full_text)
+    if full_lower is not None:
+        return classify_content_topic_lower(full_lower[start_pos:end_pos])
+    return classify_content_topic(full_text[start_pos:end_pos])
+
+@lru_cache(maxsize=4)
+def build_topic_index(full_text: str, window: int = 4000, stride: int = 2000) -> Dict[str, Tuple[int, ...]]:
+    """Classify overlapping windows of full_text once and bucket their offsets by topic"""
+    offsets_by_topic = {}
+    for start_pos in range(0, max(0, len(full_text) - window) + 1, stride):
+        topic = _classify_span(full_text, *_sentence_bounds(full_text, start_pos, window))
+        offsets_by_topic.setdefault(topic, []).append(start_pos)
+    return {topic: tuple(offsets) for topic, offsets in offsets_by_topic.items()}
+
 def get_content_by_topic(cfa_content: Dict, target_topic: str = None, max_chars: int = 4000) -> Tuple[str, str]:
     """Get content chunk classified by topic"""
     if not cfa_content or 'all_text' not in cfa_content:
@@ -88,109 +159,72 @@ def get_content_by_topic(cfa_content: Dict, target_topic: str = None, max_chars:
     
     full_text = cfa_content['all_text']
     
-    # Try multiple random chunks to find one matching the target topic
-    max_attempts = 10
-    for attempt in range(max_attempts):
-        # Get random starting position
-        max_start = max(0, len(full_text) - max_chars)
-        start_pos = random.randint(0, max_start)
-        
-        # Extract chunk
-        chunk = full_text[start_pos:start_pos + max_chars]
-        
-        # Clean up chunk (remove partial sentences at start/end)
-        sentences = chunk.split('.')
-        if len(sentences) > 2:
-            chunk = '.'.join(sentences[1:-1]) + '.'
-        
-        # Classify the chunk
-        detected_topic = classify_content_topic(chunk)
-        
-        # If we have a target topic, try to match it
-        if target_topic is None or detected_topic == target_topic or attempt == max_attempts - 1:
-            return chunk, detected_topic
+    # Windows already known to be about the target topic, if there are any
+    offsets = None
+    if target_topic is not None:
+        offsets = build_topic_index(full_text, max_chars, max(1, max_chars // 2)).get(target_topic)
     
-    # Fallback
-    return chunk, detected_topic
+    if offsets:
+        # Jitter within the window's stride so repeated picks give fresh chunks
+        stride = max(1, max_chars // 2)
+        start_pos = min(random.choice(offsets) + random.randrange(stride), max(0, len(full_text) - max_chars))
+        start_pos, end_pos = _sentence_bounds(full_text, start_pos, max_chars)
+        return full_text[start_pos:end_pos], target_topic
+    
+    # No target (or no window about it): any random chunk, classified as found
+    start_pos = random.randint(0, max(0, len(full_text) - max_chars))
+    start_pos, end_pos = _sentence_bounds(full_text, start_pos, max_chars)
+    return full_text[start_pos:end_pos], _classify_span(full_text, start_pos, end_pos)
+
+# Topic names and weights per session, split once for random.choices
+SESSION_TOPIC_CHOICES = {
+    session_type: (tuple(weights), tuple(weights.values()))
+    for session_type, weights in (("AM", CFA_TOPIC_WEIGHTS), ("PM", PM_TOPIC_WEIGHTS))
+}
 
 def select_topics_for_exam(num_questions: int, session_type: str = "AM") -> List[str]:
     """Select topics for exam questions based on CFA weights"""
-    topics = []
-    
     # Use different topic weights for AM vs PM sessions
-    if session_type == "PM":
-        topic_weights = PM_TOPIC_WEIGHTS
-    else:
-        topic_weights = CFA_TOPIC_WEIGHTS
-    
-    topic_list = list(topic_weights.keys())
-    weights = list(topic_weights.values())
-    
-    for _ in range(num_questions):
-        selected_topic = random.choices(topic_list, weights=weights)[0]
-        topics.append(selected_topic)
-    
-    return topics
+    topic_list, weights = SESSION_TOPIC_CHOICES["PM" if session_type == "PM" else "AM"]
+    return random.choices(topic_list, weights=weights, k=num_questions)
 
 def generate_content_hash(content: str) -> str:
     """Generate hash for content to track uniqueness"""
+    # One format regardless of installed packages: used_questions.json stores these
     return hashlib.md5(content.encode()).hexdigest()[:12]
 
+USED_QUESTIONS_FILE = "data/exam_sessions/used_questions.json"
+
+@lru_cache(maxsize=4)
+def _read_used_hashes(path: str, mtime_ns: int, size: int) -> FrozenSet[str]:
+    """Parse a used-hash file once per on-disk version"""
+    with open(path, 'rb') as f:
+        return frozenset(orjson.loads(f.read()).get('used_hashes', []))
+
 def load_used_questions() -> set:
     """Load previously used question hashes"""
-    used_file = "data/exam_sessions/used_questions.json"
-    if os.path.exists(used_file):
+    if os.path.exists(USED_QUESTIONS_FILE):
         try:
-            with open(used_file, 'r') as f:
-                data = json.load(f)
-                return set(data.get('used_hashes', []))
+            stat = os.stat(USED_QUESTIONS_FILE)
+            return set(_read_used_hashes(USED_QUESTIONS_FILE, stat.st_mtime_ns, stat.st_size))
         except:
             pass
     return set()
 
 def save_used_questions(used_hashes: set):
     """Save used question hashes"""
-    os.makedirs("data/exam_sessions", exist_ok=True)
-    used_file = "data/exam_sessions/used_questions.json"
+    os.makedirs(os.path.dirname(USED_QUESTIONS_FILE), exist_ok=True)
     
     try:
-        with open(used_file, 'w') as f:
-            json.dump({'used_hashes': list(used_hashes)}, f)
+        with open(USED_QUESTIONS_FILE, 'wb') as f:
+            f.write(orjson.dumps({'used_hashes': list(used_hashes)}))
     except Exception as e:
         print(f"Error saving used questions: {e}")
 
-def generate_unique_questions_from_text(session_type: str, cfa_content: Dict, num_questions: int = 1) -> List[Dict]:
-    """Generate unique questions with proper topic diversity"""
-    
-    if not cfa_content:
-        return None
-    
-    # Load previously used questions
-    used_hashes = load_used_questions()
-    
-    # Select topics based on CFA weights
-    target_topics = select_topics_for_exam(num_questions)
-    
-    questions = []
-    new_hashes = set()
-    
-    for i, target_topic in enumerate(target_topics):
-        max_attempts = 5
-        question_generated = False
-        
-        for attempt in range(max_attempts):
-            # Get content for the target topic
-            content_chunk, detected_topic = get_content_by_topic(cfa_content, target_topic, max_chars=4000)
-            
-            # Generate content hash
-            content_hash = generate_content_hash(content_chunk)
-            
-            # Skip if we've used this content before
-            if content_hash in used_hashes or content_hash in new_hashes:
-                continue
-            
-            if session_type == "AM":
-                prompt = f"""
+def build_question_prompt(session_type: str, i: int, detected_topic: str, content_chunk: str, content_hash: str) -> str:
+    """Prompt for question slot i built from one content chunk"""
+    if session_type == "AM":
+        return f"""
 Based on this CFA Level III content about {detected_topic}, create 1 AM session constructed response question.
 
 Content: {content_chunk}
@@ -205,8 +239,9 @@ Create a question that specifically tests {detected_topic} concepts. Return ONLY
     "content_hash": "{content_hash}"
 }}
 """
-            else:  # PM
-                prompt = f"""
+    
+    # PM
+    return f"""
 Based on this CFA Level III content about {detected_topic}, create 1 PM session item set with 6 multiple choice questions.
 
 Content: {content_chunk}
@@ -263,43 +298,93 @@ Create questions that specifically test {detected_topic} concepts. Return ONLY a
     ]
 }}
 """
+
+_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+async def _request_question(client, prompt: str) -> Dict:
+    """One chat completion, parsed into a question dict"""
+    response = await client.chat.completions.create(
+        model=os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview'),
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.8,  # Higher temperature for more variety
+        max_tokens=1200
+    )
+    
+    # Strip a Markdown code fence, if the model added one
+    raw_response = _FENCE.sub('', response.choices[0].message.content.strip())
+    return orjson.loads(raw_response)
+
+async def _generate_unique_questions(session_type: str, cfa_content: Dict, target_topics: List[str],
+                                     used_hashes: set, max_attempts: int = 5) -> Tuple[List[Dict], set]:
+    """Request every question slot concurrently, retrying failed slots in later waves"""
+    from src.llm_client import make_async_client
+    
+    results = {}
+    new_hashes = set()
+    pending = list(range(len(target_topics)))
+    attempts = dict.fromkeys(pending, 0)
+    
+    async with make_async_client() as client:
+        while pending:
+            # Pick unused content for every pending slot up front; hashes are
+            # checked here, centrally, so concurrent slots never share a chunk
+            requests = []
+            for i in pending:
+                target_topic = target_topics[i]
+                while attempts[i] < max_attempts:
+                    attempts[i] += 1
+                    content_chunk, detected_topic = get_content_by_topic(cfa_content, target_topic, max_chars=4000)
+                    content_hash = generate_content_hash(content_chunk)
+                    if content_hash not in used_hashes and content_hash not in new_hashes:
+                        new_hashes.add(content_hash)
+                        prompt = build_question_prompt(session_type, i, detected_topic, content_chunk, content_hash)
+                        requests.append((i, detected_topic, content_hash, prompt))
+                        break
+            
+            responses = await asyncio.gather(
+                *(_request_question(client, prompt) for _, _, _, prompt in requests),
+                return_exceptions=True
+            )
+            
+            pending = []
+            for (i, detected_topic, content_hash, _), question_data in zip(requests, responses):
+                if isinstance(question_data, Exception) or not isinstance(question_data, dict):
+                    print(f"Error generating question {i+1}, attempt {attempts[i]}: {str(question_data)}")
+                    new_hashes.discard(content_hash)
+                    if attempts[i] < max_attempts:
+                        pending.append(i)
+                    continue
             
-            try:
-                import openai
-                response = openai.chat.completions.create(
-                    model=os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview'),
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.8,  # Higher temperature for more variety
-                    max_tokens=1200
-                )
-                
-                # Clean response
-                raw_response = response.choices[0].message.content.strip()
-                if raw_response.startswith('```json'):
-                    raw_response = raw_response[7:]
-                if raw_response.endswith('```'):
-                    raw_response = raw_response[:-3]
-                raw_response = raw_response.strip()
-                
-                question_data = json.loads(raw_response)
-                
                 # Add metadata
                 question_data['generated_topic'] = detected_topic
-                question_data['target_topic'] = target_topic
+                question_data['target_topic'] = target_topics[i]
                 question_data['content_hash'] = content_hash
-                
-                questions.append(question_data)
-                new_hashes.add(content_hash)
-                question_generated = True
-                break
-                
-            except Exception as e:
-                print(f"Error generating question {i+1}, attempt {attempt+1}: {str(e)}")
-                continue
-        
-        if not question_generated:
+                results[i] = question_data
+    
+    for i, target_topic in enumerate(target_topics):
+        if i not in results:
             print(f"Failed to generate unique question {i+1} for topic {target_topic}")
     
+    return [results[i] for i in sorted(results)], new_hashes
+
+def generate_unique_questions_from_text(session_type: str, cfa_content: Dict, num_questions: int = 1) -> List[Dict]:
+    """Generate unique questions with proper topic diversity"""
+    
+    if not cfa_content:
+        return None
+    
+    # Load previously used questions
+    used_hashes = load_used_questions()
+    
+    # Select topics based on CFA weights
+    target_topics = select_topics_for_exam(num_questions)
+    
+    # All questions are requested concurrently, so the exam waits on roughly
+    # one round-trip rather than one per question
+    questions, new_hashes = asyncio.run(
+        _generate_unique_questions(session_type, cfa_content, target_topics, used_hashes)
+    )
+    
     # Save new hashes to prevent future duplicates
     if new_hashes:
         all_used_hashes = used_hashes.union(new_hashes)
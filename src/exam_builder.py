@@ -1,13 +1,42 @@
 """
 Exam builder that enforces topic weights and generates structured exams
 """
-import json
 import random
-from typing import List, Dict, Optional
+import orjson
+import numpy as np
+from collections import defaultdict
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime, timedelta
-from config.topics import TOPIC_WEIGHTS, QUESTION_TYPES
+from config.topics import (
+    TOPIC_WEIGHTS, QUESTION_TYPES, TOPIC_NAMES, TOPIC_INDEX, TOPIC_MIN_DT, TOPIC_MAX_DT
+)
 import os
 
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Exam files stay human-readable; orjson writes UTF-8 as-is, like ensure_ascii=False
+EXAM_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+# Topics by target weight (descending) for better allocation; the last one takes the remainder
+SORTED_TOPICS = tuple(
+    (topic, weights["target"] / 100)
+    for topic, weights in sorted(TOPIC_WEIGHTS.items(), key=lambda x: x[1]["target"], reverse=True)
+)
+
+def _strip_solutions(question: Dict) -> Dict:
+    """Copy of a question without its answer key (or PM item set without MCQ answers)"""
+    stripped = {k: v for k, v in question.items() if k != "answer_key"}
+    if "questions" in question:  # PM item sets
+        stripped["questions"] = [
+            {k: v for k, v in mcq.items() if k not in ("correct_answer", "explanation")}
+            for mcq in question["questions"]
+        ]
+    return stripped
+
 class CFAExamBuilder:
     def __init__(self):
         self.generated_questions = {
@@ -15,59 +44,74 @@ class CFAExamBuilder:
             "PM": []
         }
         self.used_question_ids = set()
+        # Pool indexed once at load so selection only touches matching questions
+        self.questions_by_topic = defaultdict(list)
+        self.questions_by_difficulty = defaultdict(list)
         
-    def load_questions_pool(self, questions_dir: str = "data/generated_questions"):
-        """Load all available questions from JSON files"""
+    def iter_questions_pool(self, questions_dir: str = "data/generated_questions") -> Iterator[Dict]:
+        """Stream questions from JSONL files (one per line) and legacy JSON array files"""
         if not os.path.exists(questions_dir):
             print(f"Questions directory not found: {questions_dir}")
             return
             
-        for filename in os.listdir(questions_dir):
-            if filename.endswith('.json'):
-                filepath = os.path.join(questions_dir, filename)
-                try:
-                    with open(filepath, 'r', encoding='utf-8') as f:
-                        questions = json.load(f)
-                    
-                    for question in questions:
-                        session = question.get("session", "AM")
-                        if session in self.generated_questions:
-                            self.generated_questions[session].append(question)
-                            
-                except Exception as e:
-                    print(f"Error loading {filepath}: {str(e)}")
+        for filename in sorted(os.listdir(questions_dir)):
+            filepath = os.path.join(questions_dir, filename)
+            try:
+                if filename.endswith('.jsonl'):
+                    with open(filepath, 'rb') as f:
+                        for line in f:
+                            if line.strip():
+                                yield orjson.loads(line)
+                elif filename.endswith('.json'):
+                    with open(filepath, 'rb') as f:
+                        if IJSON_AVAILABLE:
+                            # Parse array items one at a time instead of the whole file
+                            yield from ijson.items(f, 'item', use_float=True)
+                        else:
+                            yield from orjson.loads(f.read())
+                        
+            except Exception as e:
+                print(f"Error loading {filepath}: {str(e)}")
+    
+    def load_questions_pool(self, questions_dir: str = "data/generated_questions"):
+        """Load all available questions from JSONL/JSON files"""
+        for question in self.iter_questions_pool(questions_dir):
+            session = question.get("session", "AM")
+            if session in self.generated_questions:
+                self.generated_questions[session].append(question)
+                topic = question.get("topic")
+                self.questions_by_topic[(session, topic)].append(question)
+                self.questions_by_difficulty[(session, topic, question.get("difficulty"))].append(question)
     
     def calculate_topic_allocation(self, mode: str, total_questions: int) -> Dict[str, int]:
         """Calculate number of questions per topic based on weights"""
         allocation = {}
         remaining_questions = total_questions
         
-        # Sort topics by target weight (descending) for better allocation
-        sorted_topics = sorted(TOPIC_WEIGHTS.items(), 
-                             key=lambda x: x[1]["target"], reverse=True)
-        
-        for topic, weights in sorted_topics[:-1]:  # All except last topic
-            target_percentage = weights["target"] / 100
+        for topic, target_percentage in SORTED_TOPICS[:-1]:  # All except last topic
             allocated = round(total_questions * target_percentage)
             allocation[topic] = min(allocated, remaining_questions)
             remaining_questions -= allocation[topic]
         
         # Assign remaining questions to last topic
-        last_topic = sorted_topics[-1][0]
+        last_topic = SORTED_TOPICS[-1][0]
         allocation[last_topic] = remaining_questions
         
         return allocation
     
     def validate_topic_weights(self, allocation: Dict[str, int], total_questions: int) -> bool:
         """Validate that topic allocation meets weight requirements"""
-        for topic, count in allocation.items():
-            percentage = (count / total_questions) * 100
-            min_weight = TOPIC_WEIGHTS[topic]["min"]
-            max_weight = TOPIC_WEIGHTS[topic]["max"]
-            
-            if not (min_weight <= percentage <= max_weight):
-                print(f"Warning: {topic} allocation ({percentage:.1f}%) outside range ({min_weight}-{max_weight}%)")
-                return False
+        idx = np.fromiter((TOPIC_INDEX[topic] for topic in allocation), dtype=np.intp, count=len(allocation))
+        counts = np.fromiter(allocation.values(), dtype=np.float64, count=len(allocation))
+        tenths = counts * 1000 / total_questions
+        
+        out_of_range = np.flatnonzero((tenths < TOPIC_MIN_DT[idx]) | (tenths > TOPIC_MAX_DT[idx]))
+        if out_of_range.size:
+            i = out_of_range[0]
+            topic = TOPIC_NAMES[idx[i]]
+            print(f"Warning: {topic} allocation ({tenths[i] / 10:.1f}%) outside range "
+                  f"({TOPIC_WEIGHTS[topic]['min']}-{TOPIC_WEIGHTS[topic]['max']}%)")
+            return False
         return True
     
     def select_questions_by_topic(self, topic: str, count: int, mode: str, 
@@ -77,8 +121,8 @@ class CFAExamBuilder:
             exclude_ids = set()
             
         available_questions = [
-            q for q in self.generated_questions[mode] 
-            if q.get("topic") == topic and q.get("question_id") not in exclude_ids
+            q for q in self.questions_by_topic[(mode, topic)]
+            if q.get("question_id") not in exclude_ids
         ]
         
         if len(available_questions) < count:
@@ -90,7 +134,10 @@ class CFAExamBuilder:
         difficulties = ["Level_1", "Level_2", "Level_3"]
         
         for difficulty in difficulties:
-            difficulty_questions = [q for q in available_questions if q.get("difficulty") == difficulty]
+            difficulty_questions = [
+                q for q in self.questions_by_difficulty[(mode, topic, difficulty)]
+                if q.get("question_id") not in exclude_ids
+            ]
             needed = min(count - len(selected), len(difficulty_questions))
             selected.extend(random.sample(difficulty_questions, needed))
             
@@ -99,7 +146,9 @@ class CFAExamBuilder:
         
         # Fill remaining with any available questions
         if len(selected) < count:
-            remaining = [q for q in available_questions if q not in selected]
+            # Identity set: O(1) per check instead of deep dict comparisons against the list
+            selected_ids = {id(q) for q in selected}
+            remaining = [q for q in available_questions if id(q) not in selected_ids]
             needed = count - len(selected)
             selected.extend(random.sample(remaining, min(needed, len(remaining))))
         
@@ -114,12 +163,7 @@ class CFAExamBuilder:
             
         # Get question count for the mode
         question_config = QUESTION_TYPES[mode]
-        if mode == "AM":
-            total_questions = random.randint(question_config["count"]["min"], 
-                                           question_config["count"]["max"])
-        else:  # PM
-            total_questions = random.randint(question_config["count"]["min"], 
-                                           question_config["count"]["max"])
+        total_questions = random.randint(question_config.count_min, question_config.count_max)
         
         # Calculate topic allocation
         topic_allocation = self.calculate_topic_allocation(mode, total_questions)
@@ -153,7 +197,7 @@ class CFAExamBuilder:
             "session": mode,
             "created_at": datetime.now().isoformat(),
             "total_questions": len(selected_questions),
-            "total_time_minutes": question_config["time_minutes"],
+            "total_time_minutes": question_config.time_minutes,
             "total_points": total_points,
             "topic_allocation": topic_allocation,
             "topic_percentages": {
@@ -162,7 +206,7 @@ class CFAExamBuilder:
             },
             "questions": selected_questions,
             "instructions": self._get_exam_instructions(mode),
-            "time_per_question": round(question_config["time_minutes"] / len(selected_questions), 1)
+            "time_per_question": round(question_config.time_minutes / len(selected_questions), 1)
         }
         
         return exam_data
@@ -250,32 +294,27 @@ class CFAExamBuilder:
         
         exam_id = exam_data["exam_id"]
         
-        # Save exam (without solutions)
-        exam_for_student = exam_data.copy()
+        # Save exam (without solutions); built as a projection so exam_data,
+        # which shares the question dicts, keeps its answer keys
+        exam_for_student = exam_data
         if not include_solutions:
-            # Remove answer keys from questions
-            for question in exam_for_student["questions"]:
-                if "answer_key" in question:
-                    del question["answer_key"]
-                if "questions" in question:  # PM item sets
-                    for mcq in question["questions"]:
-                        if "correct_answer" in mcq:
-                            del mcq["correct_answer"]
-                        if "explanation" in mcq:
-                            del mcq["explanation"]
+            exam_for_student = {
+                **exam_data,
+                "questions": [_strip_solutions(question) for question in exam_data["questions"]]
+            }
         
         # Save student version
-        with open(f"exams/{exam_id}_exam.json", 'w', encoding='utf-8') as f:
-            json.dump(exam_for_student, f, indent=2, ensure_ascii=False)
+        with open(f"exams/{exam_id}_exam.json", 'wb') as f:
+            f.write(orjson.dumps(exam_for_student, option=EXAM_JSON_OPTIONS))
         
         # Save complete version with solutions
-        with open(f"exams/{exam_id}_solutions.json", 'w', encoding='utf-8') as f:
-            json.dump(exam_data, f, indent=2, ensure_ascii=False)
+        with open(f"exams/{exam_id}_solutions.json", 'wb') as f:
+            f.write(orjson.dumps(exam_data, option=EXAM_JSON_OPTIONS))
         
         # Save answer sheet
         answer_sheet = self.create_answer_sheet(exam_data)
-        with open(f"exams/{exam_id}_answer_sheet.json", 'w', encoding='utf-8') as f:
-            json.dump(answer_sheet, f, indent=2, ensure_ascii=False)
+        with open(f"exams/{exam_id}_answer_sheet.json", 'wb') as f:
+            f.write(orjson.dumps(answer_sheet, option=EXAM_JSON_OPTIONS))
         
         print(f"Exam saved: {exam_id}")
         return exam_id
@@ -11,6 +11,12 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak,
 from reportlab.lib import colors
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 class CFAExportUtils:
     def __init__(self):
         self.styles = getSampleStyleSheet()
@@ -192,8 +198,13 @@ class CFAExportUtils:
             clean_data = exam_data
             filename = f"exams/{exam_id}_complete.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(clean_data, f, indent=2, ensure_ascii=False)
+        if ORJSON_AVAILABLE:
+            # orjson writes UTF-8 as-is, matching ensure_ascii=False
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(clean_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(clean_data, f, indent=2, ensure_ascii=False)
         
         print(f"Exam exported to JSON: {filename}")
         return filename
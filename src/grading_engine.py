@@ -8,6 +8,12 @@ import os
 from dotenv import load_dotenv
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 load_dotenv()
 
 class CFAGradingEngine:
@@ -308,8 +314,13 @@ class CFAGradingEngine:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"exams/results/{exam_id}_{session}_results_{timestamp}.json"
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(grading_results, f, indent=2, ensure_ascii=False)
+        if ORJSON_AVAILABLE:
+            # orjson writes UTF-8 as-is, matching ensure_ascii=False
+            with open(filename, 'wb') as f:
+                f.write(orjson.dumps(grading_results, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(grading_results, f, indent=2, ensure_ascii=False)
         
         print(f"Grading results saved: {filename}")
         return filename
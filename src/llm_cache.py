@@ -0,0 +1,128 @@
+"""
+On-disk cache for LLM responses, keyed by a hash of the full request
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_CACHE_PATH = "data/processed/llm_cache.sqlite3"
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60  # 30 days
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+
+def make_cache_key(model: str, messages: List[Dict], temperature: float, max_tokens: int) -> str:
+    """Build a stable SHA-256 key for a chat completion request"""
+    payload = json.dumps({
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, created_at REAL NOT NULL, response BLOB NOT NULL)"
+        )
+
+    def _execute(self, sql: str, params: tuple = ()):
+        """Run one statement on a short-lived connection (safe across Streamlit threads)"""
+        with closing(sqlite3.connect(self.path, timeout=10)) as conn:
+            with conn:
+                return conn.execute(sql, params).fetchone()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response text, or None if missing or expired"""
+        row = self._execute("SELECT created_at, response FROM responses WHERE key = ?", (key,))
+        if row is None:
+            return None
+
+        created_at, response = row
+        if time.time() - created_at > self.ttl_seconds:
+            self._execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+
+        return zlib.decompress(response).decode("utf-8")
+
+    def put(self, key: str, response: str):
+        """Store a response, compressed, replacing any previous entry"""
+        self._execute(
+            "INSERT OR REPLACE INTO responses (key, created_at, response) VALUES (?, ?, ?)",
+            (key, time.time(), zlib.compress(response.encode("utf-8")))
+        )
+
+class SemanticResponseCache:
+    """Reuse responses for near-duplicate prompts via cosine similarity of embeddings"""
+
+    def __init__(self, embed_fn: Callable[[str], List[float]], path: str = DEFAULT_CACHE_PATH,
+                 threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        self.embed_fn = embed_fn
+        self.path = path
+        self.threshold = threshold
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+        with closing(sqlite3.connect(self.path, timeout=10)) as conn:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS semantic_responses ("
+                    "id INTEGER PRIMARY KEY, namespace TEXT NOT NULL, "
+                    "vector BLOB NOT NULL, response BLOB NOT NULL)"
+                )
+            rows = conn.execute("SELECT namespace, vector, response FROM semantic_responses").fetchall()
+
+        # Vectors are kept unit-normalized in memory so a dot product is the cosine
+        self._entries: Dict[str, Tuple[List[np.ndarray], List[bytes]]] = {}
+        for namespace, vector, response in rows:
+            vectors, responses = self._entries.setdefault(namespace, ([], []))
+            vectors.append(np.frombuffer(vector, dtype=np.float32))
+            responses.append(response)
+        self._matrices: Dict[str, np.ndarray] = {}
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed text as a unit-length float32 vector"""
+        vector = np.asarray(self.embed_fn(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, namespace: str, vector: np.ndarray) -> Optional[str]:
+        """Return the closest cached response if it clears the similarity threshold"""
+        if namespace not in self._entries:
+            return None
+
+        matrix = self._matrices.get(namespace)
+        if matrix is None:
+            matrix = np.vstack(self._entries[namespace][0])
+            self._matrices[namespace] = matrix
+
+        scores = matrix @ vector
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+
+        return zlib.decompress(self._entries[namespace][1][best]).decode("utf-8")
+
+    def add(self, namespace: str, vector: np.ndarray, response: str):
+        """Persist a new vector/response pair"""
+        compressed = zlib.compress(response.encode("utf-8"))
+        with closing(sqlite3.connect(self.path, timeout=10)) as conn:
+            with conn:
+                conn.execute(
+                    "INSERT INTO semantic_responses (namespace, vector, response) VALUES (?, ?, ?)",
+                    (namespace, vector.tobytes(), compressed)
+                )
+
+        vectors, responses = self._entries.setdefault(namespace, ([], []))
+        vectors.append(vector)
+        responses.append(compressed)
+        self._matrices.pop(namespace, None)
@@ -0,0 +1,31 @@
+"""
+Shared construction of the async OpenAI client used for batched generation
+"""
+import importlib.util
+import os
+
+from openai import AsyncOpenAI
+
+try:
+    import httpx
+    # httpx only speaks HTTP/2 when h2 is installed
+    HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Enough pooled connections for every request in one concurrent batch
+MAX_KEEPALIVE_CONNECTIONS = 16
+
+def make_async_client() -> AsyncOpenAI:
+    """
+    One AsyncOpenAI client for a batch of concurrent calls. Uses a single
+    HTTP/2 connection pool when h2 is available; create one per event loop
+    (i.e. per asyncio.run) since pooled connections are bound to their loop.
+    """
+    http_client = None
+    if HTTP2_AVAILABLE:
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+        )
+    return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client)
@@ -1,14 +1,17 @@
 """
 PDF processing and content extraction for CFA books
 """
+import mmap
 import os
 import re
-from typing import List, Dict, Tuple
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 from PyPDF2 import PdfReader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 import tiktoken
-from config.topics import TOPIC_KEYWORDS
+from config.topics import classify_topic
 
 class CFAPDFProcessor:
     def __init__(self, chunk_size: int = 500, chunk_overlap: int = 50):
@@ -21,10 +24,10 @@ class CFAPDFProcessor:
         )
         self.encoding = tiktoken.get_encoding("cl100k_base")
         
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from a PDF file"""
+    def extract_text_from_pdf(self, pdf_path: str, stream: Optional[BinaryIO] = None) -> str:
+        """Extract text from a PDF file, or from an already-open stream of it"""
         try:
-            reader = PdfReader(pdf_path)
+            reader = PdfReader(stream if stream is not None else pdf_path)
             text = ""
             for page in reader.pages:
                 text += page.extract_text() + "\n"
@@ -45,22 +48,7 @@ class CFAPDFProcessor:
     
     def classify_chunk_topic(self, chunk: str) -> str:
         """Classify a text chunk into CFA topics based on keywords"""
-        chunk_lower = chunk.lower()
-        topic_scores = {}
-        
-        for topic, keywords in TOPIC_KEYWORDS.items():
-            score = 0
-            for keyword in keywords:
-                # Count keyword occurrences with word boundaries
-                pattern = r'\b' + re.escape(keyword.lower()) + r'\b'
-                matches = len(re.findall(pattern, chunk_lower))
-                score += matches
-            topic_scores[topic] = score
-        
-        # Return topic with highest score, or "General" if no clear match
-        if max(topic_scores.values()) > 0:
-            return max(topic_scores, key=topic_scores.get)
-        return "General"
+        return classify_topic(chunk)
     
     def extract_eoc_questions(self, text: str) -> List[Dict]:
         """Extract End of Chapter questions if available"""
@@ -111,13 +99,13 @@ class CFAPDFProcessor:
         
         return questions
     
-    def process_pdf(self, pdf_path: str) -> Dict:
+    def process_pdf(self, pdf_path: str, stream: Optional[BinaryIO] = None) -> Dict:
         """Process a single PDF and return structured content"""
         filename = os.path.basename(pdf_path)
         print(f"Processing {filename}...")
         
         # Extract text
-        raw_text = self.extract_text_from_pdf(pdf_path)
+        raw_text = self.extract_text_from_pdf(pdf_path, stream)
         if not raw_text:
             return {"error": f"Could not extract text from {filename}"}
         
@@ -152,37 +140,84 @@ class CFAPDFProcessor:
             "total_tokens": sum([chunk["token_count"] for chunk in classified_chunks])
         }
     
-    def process_multiple_pdfs(self, pdf_paths: List[str]) -> Dict:
-        """Process multiple PDFs and combine results"""
-        all_results = {
-            "processed_files": [],
-            "all_chunks": [],
-            "all_eoc_questions": [],
-            "topic_distribution": {},
-            "total_tokens": 0
-        }
-        
+    def iter_pdfs(self, pdf_paths: List[str]) -> Iterator[Dict]:
+        """Yield per-file results one PDF at a time"""
         for pdf_path in pdf_paths:
             if os.path.exists(pdf_path):
-                result = self.process_pdf(pdf_path)
-                if "error" not in result:
-                    all_results["processed_files"].append(result["source_file"])
-                    all_results["all_chunks"].extend(result["chunks"])
-                    all_results["all_eoc_questions"].extend(result["eoc_questions"])
-                    all_results["total_tokens"] += result["total_tokens"]
-                    
-                    # Update topic distribution
-                    for chunk in result["chunks"]:
-                        topic = chunk["topic"]
-                        if topic not in all_results["topic_distribution"]:
-                            all_results["topic_distribution"][topic] = 0
-                        all_results["topic_distribution"][topic] += 1
-                else:
-                    print(f"Error processing {pdf_path}: {result['error']}")
+                yield self.process_pdf(pdf_path)
             else:
                 print(f"File not found: {pdf_path}")
-        
-        return all_results
+    
+    def process_multiple_pdfs(self, pdf_paths: List[str]) -> Dict:
+        """Process multiple PDFs and combine results"""
+        # Each file's result is folded in as it is produced, so per-file
+        # dicts are never all held at once
+        return combine_pdf_results(self.iter_pdfs(pdf_paths))
+
+def combine_pdf_results(results: Iterable[Dict]) -> Dict:
+    """Combine per-file results from process_pdf into a single corpus"""
+    all_results = {
+        "processed_files": [],
+        "all_chunks": [],
+        "all_eoc_questions": [],
+        "topic_distribution": {},
+        "total_tokens": 0
+    }
+    
+    for result in results:
+        if "error" not in result:
+            all_results["processed_files"].append(result["source_file"])
+            all_results["all_chunks"].extend(result["chunks"])
+            all_results["all_eoc_questions"].extend(result["eoc_questions"])
+            all_results["total_tokens"] += result["total_tokens"]
+            
+            # Update topic distribution
+            for chunk in result["chunks"]:
+                topic = chunk["topic"]
+                if topic not in all_results["topic_distribution"]:
+                    all_results["topic_distribution"][topic] = 0
+                all_results["topic_distribution"][topic] += 1
+        else:
+            print(f"Error processing PDF: {result['error']}")
+    
+    return all_results
+
+def group_chunks_by_topic(chunks: List[Dict]) -> Dict[str, List[Dict]]:
+    """Group chunks by their classified topic in a single pass"""
+    chunks_by_topic = defaultdict(list)
+    for chunk in chunks:
+        chunks_by_topic[chunk.get("topic", "General")].append(chunk)
+    return dict(chunks_by_topic)
+
+@contextmanager
+def mapped_pdf(pdf_path: str):
+    """
+    Read-only memory map of a PDF, advised for sequential access. Hashing and
+    parsing both read through the page cache instead of copying the file into
+    userspace buffers. Yields None for empty files, which cannot be mapped.
+    """
+    with open(pdf_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield None
+            return
+        if hasattr(os, "posix_fadvise"):
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield mm
+
+def _get_max_workers() -> int:
+    """Worker count for parallel PDF ingestion, capped to keep memory bounded"""
+    return min(os.cpu_count() or 1, 8)
+
+def _process_one_pdf(pdf_path: str) -> Dict:
+    """
+    Worker entry point for parallel ingestion. Each worker process builds its
+    own processor so nothing needs to be shared or pickled besides the path.
+    """
+    if not os.path.exists(pdf_path):
+        return {"error": f"File not found: {pdf_path}"}
+    with mapped_pdf(pdf_path) as mm:
+        return CFAPDFProcessor().process_pdf(pdf_path, mm)
 
 def ingest_pdfs(pdf_list: List[str], output_format: str = "chunked_text_by_topic") -> Dict:
     """
@@ -192,14 +227,6 @@ def ingest_pdfs(pdf_list: List[str], output_format: str = "chunked_text_by_topic
     results = processor.process_multiple_pdfs(pdf_list)
     
     if output_format == "chunked_text_by_topic":
-        # Organize chunks by topic
-        topic_chunks = {}
-        for chunk in results["all_chunks"]:
-            topic = chunk["topic"]
-            if topic not in topic_chunks:
-                topic_chunks[topic] = []
-            topic_chunks[topic].append(chunk)
-        
-        results["chunks_by_topic"] = topic_chunks
+        results["chunks_by_topic"] = group_chunks_by_topic(results["all_chunks"])
     
     return results
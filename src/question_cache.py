@@ -0,0 +1,28 @@
+"""
+On-disk cache of raw model responses for robust_app.py's question generation
+"""
+import hashlib
+import os
+from functools import lru_cache
+
+QUESTION_CACHE_DIR = "data/processed/question_cache"
+
+def question_cache_key(session_type: str, model: str, prompt: str) -> str:
+    """Key a generated question by session, model and the exact prompt sent"""
+    payload = f"{session_type}|{model}|{prompt}"
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+@lru_cache(maxsize=256)
+def read_cached_response(key: str) -> str:
+    """Cached model response text; raises FileNotFoundError on a miss so misses are never memoized"""
+    with open(f"{QUESTION_CACHE_DIR}/{key}.json", 'r', encoding='utf-8') as f:
+        return f.read()
+
+def write_cached_response(key: str, raw_response: str):
+    """Atomically store a response that parsed successfully"""
+    os.makedirs(QUESTION_CACHE_DIR, exist_ok=True)
+    cache_file = f"{QUESTION_CACHE_DIR}/{key}.json"
+    tmp_file = f"{cache_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        f.write(raw_response)
+    os.replace(tmp_file, cache_file)
@@ -1,35 +1,133 @@
 """
 AI-powered question generation for CFA Level III mock exams
 """
+import asyncio
 import json
 import random
-from typing import List, Dict, Optional
-from openai import OpenAI
-from config.topics import TOPIC_WEIGHTS, QUESTION_TYPES, DIFFICULTY_LEVELS
+import orjson
+from typing import List, Dict, Optional, Tuple
+from openai import AsyncOpenAI, OpenAI
+from config.topics import TOPIC_WEIGHTS, QUESTION_TYPES, DIFFICULTY_LEVELS, sample_difficulties
+from src.llm_cache import LLMResponseCache, SemanticResponseCache, make_cache_key
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Shared first message for every request so provider-side prompt caching can
+# reuse the same prefix across calls
+SYSTEM_PROMPT = "You are a CFA Level III exam question writer."
+EMBEDDING_MODEL = "text-embedding-3-small"
+# Chunk text included in each prompt (and embedded for the semantic cache)
+PROMPT_CONTENT_CHARS = 1500
+# Upper bound on in-flight chat completions to stay under OpenAI rate limits
+MAX_CONCURRENT_REQUESTS = 8
+
 class CFAQuestionGenerator:
-    def __init__(self):
+    def __init__(self, cache: Optional[LLMResponseCache] = None, semantic_cache: bool = False):
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = os.getenv("OPENAI_MODEL", "gpt-4-turbo-preview")
+        self.cache = cache if cache is not None else LLMResponseCache()
+        # Opt-in: it only catches re-processed copies of a chunk the exact cache
+        # missed, and costs an embeddings call on every exact-cache miss
+        self.semantic_cache = SemanticResponseCache(self._embed) if semantic_cache else None
+    
+    def _embed(self, text: str) -> List[float]:
+        """Embed chunk content for the semantic cache"""
+        response = self.client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+        return response.data[0].embedding
+    
+    def _lookup_cached(self, prompt: str, question_type: str, chunk: Dict, difficulty: str,
+                       temperature: float, max_tokens: int) -> Tuple[Optional[str], Dict]:
+        """Check the exact and semantic caches; returns any hit plus the context for storing a fresh response"""
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        cache_key = make_cache_key(self.model, messages, temperature, max_tokens)
         
-    def generate_constructed_response_question(self, chunk: Dict, difficulty: str = "Level_2") -> Dict:
-        """Generate AM session constructed response question"""
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached, {}
+        
+        # The prompt is mostly fixed template text, so only the chunk content is
+        # embedded, and a near-duplicate only counts for the same chunk and difficulty
+        context = {
+            "messages": messages,
+            "cache_key": cache_key,
+            "namespace": f"{self.model}:{question_type}:{chunk['chunk_id']}:{difficulty}",
+            "vector": None
+        }
+        if self.semantic_cache is not None:
+            context["vector"] = self.semantic_cache.embed(chunk['content'][:PROMPT_CONTENT_CHARS])
+            similar = self.semantic_cache.lookup(context["namespace"], context["vector"])
+            if similar is not None:
+                self.cache.put(cache_key, similar)
+                return similar, context
+        
+        return None, context
+    
+    def _store_response(self, context: Dict, content: str) -> Dict:
+        """Parse a fresh response and add it to the caches"""
+        # Parse before caching so malformed responses are never replayed
+        question_data = json.loads(content)
+        self.cache.put(context["cache_key"], content)
+        if context["vector"] is not None:
+            self.semantic_cache.add(context["namespace"], context["vector"], content)
+        return question_data
+    
+    def _complete_json(self, prompt: str, question_type: str, chunk: Dict, difficulty: str,
+                       temperature: float, max_tokens: int) -> Dict:
+        """Run a chat completion and parse its JSON, replaying cached responses when possible"""
+        cached, context = self._lookup_cached(prompt, question_type, chunk, difficulty, temperature, max_tokens)
+        if cached is not None:
+            return json.loads(cached)
+        
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=context["messages"],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return self._store_response(context, response.choices[0].message.content)
+    
+    async def _complete_json_async(self, client: AsyncOpenAI, prompt: str, question_type: str, chunk: Dict,
+                                   difficulty: str, temperature: float, max_tokens: int) -> Dict:
+        """Async counterpart of _complete_json"""
+        # Cache lookups may embed over the network, so keep them off the event loop
+        cached, context = await asyncio.to_thread(
+            self._lookup_cached, prompt, question_type, chunk, difficulty, temperature, max_tokens
+        )
+        if cached is not None:
+            return json.loads(cached)
         
-        prompt = f"""
-        You are a CFA Level III exam question writer. Based on the following content chunk, create ONE high-quality constructed response question that matches the real CFA Level III AM session format.
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=context["messages"],
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        return self._store_response(context, response.choices[0].message.content)
+    
+    def _pick_chunks_and_difficulties(self, topic_chunks: List[Dict], num_questions: int) -> List[Tuple[Dict, str]]:
+        """Randomly sample chunks (to avoid repetition) and vary difficulty levels"""
+        selected_chunks = random.sample(topic_chunks, min(num_questions, len(topic_chunks)))
+        difficulties = sample_difficulties(len(selected_chunks))
+        return list(zip(selected_chunks, difficulties))
+    
+    def _constructed_prompt(self, chunk: Dict, difficulty: str) -> str:
+        """Build the AM constructed response prompt"""
+        return f"""
+        Based on the following content chunk, create ONE high-quality constructed response question that matches the real CFA Level III AM session format.
 
         Content Topic: {chunk['topic']}
-        Content: {chunk['content'][:1500]}...
+        Content: {chunk['content'][:PROMPT_CONTENT_CHARS]}...
 
         Requirements:
         1. Create a realistic scenario-based question (like a case study)
         2. The question should require 15-20 minutes to answer
         3. Include specific numerical data where appropriate
-        4. Difficulty level: {difficulty} - {DIFFICULTY_LEVELS[difficulty]['description']}
+        4. Difficulty level: {difficulty} - {DIFFICULTY_LEVELS[difficulty].description}
         5. Follow CFA Institute writing style and terminology
         6. Include 3-5 sub-questions (parts A, B, C, etc.)
 
@@ -54,41 +152,46 @@ class CFAQuestionGenerator:
             "learning_objectives": ["LO1", "LO2", "LO3"]
         }}
         """
+    
+    def generate_constructed_response_question(self, chunk: Dict, difficulty: str = "Level_2") -> Dict:
+        """Generate AM session constructed response question"""
+        prompt = self._constructed_prompt(chunk, difficulty)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=2000
-            )
-            
-            question_data = json.loads(response.choices[0].message.content)
-            question_data["type"] = "constructed_response"
-            question_data["session"] = "AM"
-            question_data["source_chunk"] = chunk["chunk_id"]
-            
-            return question_data
+            question_data = self._complete_json(prompt, "constructed", chunk, difficulty, temperature=0.7, max_tokens=2000)
+            return self._tag_question(question_data, "constructed", chunk)
             
         except Exception as e:
             print(f"Error generating constructed response question: {str(e)}")
             return None
     
-    def generate_item_set_question(self, chunk: Dict, difficulty: str = "Level_2") -> Dict:
-        """Generate PM session item set with 3 MCQs"""
+    async def generate_constructed_response_question_async(self, client: AsyncOpenAI, chunk: Dict,
+                                                           difficulty: str = "Level_2") -> Dict:
+        """Async counterpart of generate_constructed_response_question"""
+        prompt = self._constructed_prompt(chunk, difficulty)
         
-        prompt = f"""
-        You are a CFA Level III exam question writer. Based on the following content chunk, create ONE item set with 3 multiple choice questions that matches the real CFA Level III PM session format.
+        try:
+            question_data = await self._complete_json_async(client, prompt, "constructed", chunk, difficulty, temperature=0.7, max_tokens=2000)
+            return self._tag_question(question_data, "constructed", chunk)
+            
+        except Exception as e:
+            print(f"Error generating constructed response question: {str(e)}")
+            return None
+    
+    def _item_set_prompt(self, chunk: Dict, difficulty: str) -> str:
+        """Build the PM item set prompt"""
+        return f"""
+        Based on the following content chunk, create ONE item set with 3 multiple choice questions that matches the real CFA Level III PM session format.
 
         Content Topic: {chunk['topic']}
-        Content: {chunk['content'][:1500]}...
+        Content: {chunk['content'][:PROMPT_CONTENT_CHARS]}...
 
         Requirements:
         1. Create a realistic vignette (case study scenario)
         2. Follow with exactly 3 multiple choice questions
         3. Each question should have 4 options (A, B, C, D)
         4. Questions should build on the vignette and each other
-        5. Difficulty level: {difficulty} - {DIFFICULTY_LEVELS[difficulty]['description']}
+        5. Difficulty level: {difficulty} - {DIFFICULTY_LEVELS[difficulty].description}
         6. Follow CFA Institute writing style and terminology
         7. Include calculations where appropriate
 
@@ -144,26 +247,43 @@ class CFAQuestionGenerator:
             "learning_objectives": ["LO1", "LO2", "LO3"]
         }}
         """
+    
+    def generate_item_set_question(self, chunk: Dict, difficulty: str = "Level_2") -> Dict:
+        """Generate PM session item set with 3 MCQs"""
+        prompt = self._item_set_prompt(chunk, difficulty)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7,
-                max_tokens=2500
-            )
-            
-            question_data = json.loads(response.choices[0].message.content)
-            question_data["type"] = "item_set"
-            question_data["session"] = "PM"
-            question_data["source_chunk"] = chunk["chunk_id"]
+            question_data = self._complete_json(prompt, "item_set", chunk, difficulty, temperature=0.7, max_tokens=2500)
+            return self._tag_question(question_data, "item_set", chunk)
             
-            return question_data
+        except Exception as e:
+            print(f"Error generating item set question: {str(e)}")
+            return None
+    
+    async def generate_item_set_question_async(self, client: AsyncOpenAI, chunk: Dict,
+                                               difficulty: str = "Level_2") -> Dict:
+        """Async counterpart of generate_item_set_question"""
+        prompt = self._item_set_prompt(chunk, difficulty)
+        
+        try:
+            question_data = await self._complete_json_async(client, prompt, "item_set", chunk, difficulty, temperature=0.7, max_tokens=2500)
+            return self._tag_question(question_data, "item_set", chunk)
             
         except Exception as e:
             print(f"Error generating item set question: {str(e)}")
             return None
     
+    def _tag_question(self, question_data: Dict, question_type: str, chunk: Dict) -> Dict:
+        """Attach type, session and source metadata to a parsed question"""
+        if question_type == "constructed":
+            question_data["type"] = "constructed_response"
+            question_data["session"] = "AM"
+        else:
+            question_data["type"] = "item_set"
+            question_data["session"] = "PM"
+        question_data["source_chunk"] = chunk["chunk_id"]
+        return question_data
+    
     def generate_questions(self, chunk: Dict, question_type: str = "constructed") -> Dict:
         """
         Main function to generate questions as specified in requirements
@@ -180,16 +300,7 @@ class CFAQuestionGenerator:
         """Generate multiple questions for a specific topic"""
         questions = []
         
-        # Randomly sample chunks to avoid repetition
-        selected_chunks = random.sample(topic_chunks, min(num_questions, len(topic_chunks)))
-        
-        for chunk in selected_chunks:
-            # Vary difficulty levels
-            difficulty = random.choices(
-                list(DIFFICULTY_LEVELS.keys()),
-                weights=[DIFFICULTY_LEVELS[d]["weight"] for d in DIFFICULTY_LEVELS.keys()]
-            )[0]
-            
+        for chunk, difficulty in self._pick_chunks_and_difficulties(topic_chunks, num_questions):
             if question_type == "constructed":
                 question = self.generate_constructed_response_question(chunk, difficulty)
             else:
@@ -200,23 +311,55 @@ class CFAQuestionGenerator:
         
         return questions
     
+    async def generate_questions_for_topic_async(self, client: AsyncOpenAI, topic_chunks: List[Dict],
+                                                 question_type: str, num_questions: int,
+                                                 semaphore: Optional[asyncio.Semaphore] = None) -> List[Dict]:
+        """
+        Generate multiple questions for a topic concurrently, bounded by an optional semaphore.
+        client comes from make_async_client() inside the caller's event loop.
+        """
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        
+        async def generate_one(chunk: Dict, difficulty: str) -> Optional[Dict]:
+            async with semaphore:
+                if question_type == "constructed":
+                    return await self.generate_constructed_response_question_async(client, chunk, difficulty)
+                return await self.generate_item_set_question_async(client, chunk, difficulty)
+        
+        results = await asyncio.gather(*[
+            generate_one(chunk, difficulty)
+            for chunk, difficulty in self._pick_chunks_and_difficulties(topic_chunks, num_questions)
+        ])
+        return [question for question in results if question]
+    
     def save_questions_to_json(self, questions: List[Dict], filename: str):
         """Save generated questions to JSON file"""
         os.makedirs("data/generated_questions", exist_ok=True)
         filepath = f"data/generated_questions/{filename}"
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(questions, f, indent=2, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(questions))
         
         print(f"Saved {len(questions)} questions to {filepath}")
     
+    def append_questions_to_jsonl(self, questions: List[Dict], filename: str):
+        """Append generated questions to a JSONL file, one question per line"""
+        os.makedirs("data/generated_questions", exist_ok=True)
+        filepath = f"data/generated_questions/{filename}"
+        
+        with open(filepath, 'ab') as f:
+            f.write(b"".join(orjson.dumps(question) + b"\n" for question in questions))
+        
+        print(f"Appended {len(questions)} questions to {filepath}")
+    
     def load_questions_from_json(self, filename: str) -> List[Dict]:
         """Load questions from JSON file"""
         filepath = f"data/generated_questions/{filename}"
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                questions = json.load(f)
+            with open(filepath, 'rb') as f:
+                questions = orjson.loads(f.read())
             return questions
         except FileNotFoundError:
             print(f"File not found: {filepath}")
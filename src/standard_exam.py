@@ -0,0 +1,201 @@
+"""
+Records and hand-written content for the standard exam in complete_app.py
+
+Kept out of the entry script, which Streamlit re-executes on every rerun;
+as an imported module they are built once per process, and exam records
+kept in session_state stay instances of the same classes across reruns.
+"""
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, List
+
+# Exam records; slotted dataclasses are smaller than dicts and use attribute access
+@dataclass(slots=True)
+class SubQuestion:
+    part: str
+    question: str
+    points: int
+    widget_key: str
+
+@dataclass(slots=True)
+class AMQuestion:
+    question_id: str
+    question_number: int
+    topic: str
+    scenario: str
+    sub_questions: List[SubQuestion]
+    total_points: int
+    estimated_time_minutes: int
+    answer_key: List[Dict]
+
+@dataclass(slots=True)
+class MCQ:
+    question_number: int
+    question_text: str
+    options: Dict[str, str]
+    correct_answer: str
+    explanation: str
+    points: int
+    widget_key: str
+    option_labels: Dict[str, str]
+
+@dataclass(slots=True)
+class ItemSet:
+    item_set_id: str
+    set_number: int
+    topic: str
+    vignette: str
+    questions: List[MCQ]
+    total_points: int
+    estimated_time_minutes: int
+
+# Used for the core topics; other topics get a generic scenario from a chunk
+AM_SCENARIOS = MappingProxyType({
+    "Asset Allocation": {
+        "scenario": "You are the chief investment officer for the ABC Pension Fund, which has $5 billion in assets under management. The fund's current strategic asset allocation is 60% equities, 30% fixed income, and 10% alternatives. The board is concerned about the fund's risk exposure and is considering a review of the asset allocation policy.",
+        "sub_questions": [
+            {"part": "A", "question": "Explain the key principles of strategic asset allocation and how they differ from tactical asset allocation approaches.", "points": 8},
+            {"part": "B", "question": "Describe three methods for determining optimal asset allocation weights and discuss their relative advantages and limitations.", "points": 12},
+            {"part": "C", "question": "Calculate the expected portfolio return and standard deviation given the following assumptions: Equities (E[R]=8%, σ=18%), Bonds (E[R]=4%, σ=6%), Alternatives (E[R]=10%, σ=22%), with correlations ρ(E,B)=0.2, ρ(E,A)=0.6, ρ(B,A)=0.1.", "points": 10}
+        ]
+    },
+    "Portfolio Construction": {
+        "scenario": "XYZ Asset Management is launching a new multi-factor equity strategy for institutional clients. The strategy will target exposure to value, momentum, quality, and low volatility factors across developed markets.",
+        "sub_questions": [
+            {"part": "A", "question": "Describe the theoretical foundation for each of the four factors and explain why they are expected to generate risk premiums.", "points": 12},
+            {"part": "B", "question": "Discuss the implementation challenges in factor investing and propose solutions for factor timing and portfolio construction.", "points": 10},
+            {"part": "C", "question": "Design a factor allocation framework that balances factor exposures while managing turnover and transaction costs.", "points": 8}
+        ]
+    },
+    "Performance Management": {
+        "scenario": "The DEF Endowment Fund has hired you to evaluate the performance of their equity portfolio over the past three years. The portfolio returned 12.5% annually while the benchmark returned 11.2%. The portfolio's tracking error was 4.2%.",
+        "sub_questions": [
+            {"part": "A", "question": "Calculate and interpret the information ratio, Sharpe ratio (assuming risk-free rate of 2%), and Treynor ratio (portfolio beta = 1.1) for the portfolio.", "points": 10},
+            {"part": "B", "question": "Conduct a Brinson-Fachler performance attribution analysis to decompose returns into asset allocation, security selection, and interaction effects.", "points": 12},
+            {"part": "C", "question": "Evaluate whether the portfolio's active risk budget is being used efficiently and recommend improvements.", "points": 8}
+        ]
+    },
+    "Portfolio Management Pathway": {
+        "scenario": "You are advising a high-net-worth family with $50 million in investable assets. The family consists of a 55-year-old entrepreneur, his 52-year-old spouse, and two children aged 16 and 18. They have significant tax considerations and estate planning needs.",
+        "sub_questions": [
+            {"part": "A", "question": "Identify and analyze the key constraints and objectives for this family's investment policy statement.", "points": 8},
+            {"part": "B", "question": "Design an appropriate asset allocation strategy considering their tax situation, liquidity needs, and multi-generational wealth transfer goals.", "points": 12},
+            {"part": "C", "question": "Recommend specific investment structures and vehicles to optimize after-tax returns and facilitate wealth transfer.", "points": 10}
+        ]
+    }
+})
+
+PM_VIGNETTES = MappingProxyType({
+    "Asset Allocation": {
+        "vignette": "Global Pension Advisors (GPA) manages a $10 billion pension fund for a large corporation. The fund's current allocation is 55% equities, 35% bonds, and 10% alternatives. The fund has a 15-year investment horizon and moderate risk tolerance. GPA is considering implementing a liability-driven investment (LDI) approach.",
+        "questions": [
+            {
+                "question_text": "Which asset allocation approach would be most appropriate for implementing an LDI strategy?",
+                "options": {
+                    "A": "Increase equity allocation to 70% for higher expected returns",
+                    "B": "Match asset duration to liability duration and hedge interest rate risk",
+                    "C": "Implement tactical asset allocation based on market timing",
+                    "D": "Focus solely on maximizing absolute returns"
+                },
+                "correct_answer": "B",
+                "explanation": "LDI focuses on matching assets to liabilities, particularly duration matching and interest rate hedging."
+            },
+            {
+                "question_text": "The primary benefit of strategic asset allocation is:",
+                "options": {
+                    "A": "Maximizing short-term returns",
+                    "B": "Providing a long-term framework for achieving investment objectives",
+                    "C": "Eliminating all portfolio risk",
+                    "D": "Guaranteeing outperformance of benchmarks"
+                },
+                "correct_answer": "B",
+                "explanation": "Strategic asset allocation provides the long-term framework aligned with investment objectives and constraints."
+            },
+            {
+                "question_text": "When rebalancing a strategic asset allocation, the most important consideration is:",
+                "options": {
+                    "A": "Market timing opportunities",
+                    "B": "Transaction costs and tax implications",
+                    "C": "Short-term performance relative to peers",
+                    "D": "Manager selection decisions"
+                },
+                "correct_answer": "B",
+                "explanation": "Rebalancing decisions must consider transaction costs and tax implications to ensure net benefits."
+            }
+        ]
+    },
+    "Portfolio Construction": {
+        "vignette": "Systematic Investment Management (SIM) is developing a multi-factor equity strategy targeting value, momentum, and quality factors. The strategy will use a quantitative approach to construct portfolios with controlled risk exposures.",
+        "questions": [
+            {
+                "question_text": "The value factor is most likely to outperform when:",
+                "options": {
+                    "A": "Interest rates are declining rapidly",
+                    "B": "Economic growth is accelerating from recession",
+                    "C": "Market volatility is at historic lows",
+                    "D": "Technology stocks are leading market gains"
+                },
+                "correct_answer": "B",
+                "explanation": "Value stocks typically outperform during economic recoveries when their fundamentals improve."
+            },
+            {
+                "question_text": "A key challenge in factor investing is:",
+                "options": {
+                    "A": "Factors always provide positive returns",
+                    "B": "Factor premiums can experience long periods of underperformance",
+                    "C": "Factors are perfectly correlated with each other",
+                    "D": "Factor strategies have no implementation costs"
+                },
+                "correct_answer": "B",
+                "explanation": "Factor premiums can underperform for extended periods, testing investor patience."
+            },
+            {
+                "question_text": "When constructing a multi-factor portfolio, the most important consideration is:",
+                "options": {
+                    "A": "Maximizing exposure to the highest returning factor",
+                    "B": "Balancing factor exposures while managing correlations",
+                    "C": "Minimizing the number of holdings",
+                    "D": "Focusing only on momentum factors"
+                },
+                "correct_answer": "B",
+                "explanation": "Multi-factor portfolios require balancing exposures and managing correlations between factors."
+            }
+        ]
+    }
+})
+
+# complete_app.py session state; initialize_session_state copies each value
+SESSION_DEFAULTS = MappingProxyType({
+    'processed_content': None,
+    'current_exam': None,
+    'exam_started': False,
+    'start_time': None,
+    'am_answers': [],
+    'pm_answers': [],
+    'exam_submitted': False,
+    'grading_results': None
+})
+
+# complete_app.py page text, one markdown element per block
+CONTENT_SOURCE_HEADER_MD = "---\n### 📚 Content Source"
+SAMPLE_CONTENT_MD = (
+    "📄 Using Sample Content\n\n"
+    "Questions from pre-loaded CFA material\n\n"
+    "(Not from your uploaded books)"
+)
+AM_FORMAT_MD = "\n".join([
+    "**AM Session (Morning)**",
+    "",
+    "- 4 constructed response questions",
+    "- 180 minutes (3 hours)",
+    "- 45 minutes per question",
+    "- Essay format with calculations"
+])
+PM_FORMAT_MD = "\n".join([
+    "**PM Session (Afternoon)**",
+    "",
+    "- 5 item sets (case studies)",
+    "- 3 MCQs per item set (15 total)",
+    "- 180 minutes (3 hours)",
+    "- 36 minutes per item set"
+])